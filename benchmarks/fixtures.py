@@ -0,0 +1,224 @@
+from json import dumps as json_dump
+from pathlib import Path
+from random import Random
+
+from esg.game import Game
+from esg.steam import create_shortcut
+from esg.steam.shortcuts import dumps as vdf_dump
+
+# Environment variables the app's Windows paths are expanded from
+ENV_PROGRAM_FILES = "ProgramFiles(x86)"
+ENV_PROGRAM_DATA = "ProgramData"
+ENV_LOCAL_APP_DATA = "LocalAppData"
+
+
+def _get_gog_games(count, rng):
+    return [
+        (str(1000000000 + i), f"GOG Game {i} {rng.randrange(10**6)}")
+        for i in range(count)
+    ]
+
+
+def _get_epic_games(count, rng):
+    return [
+        (f"{rng.getrandbits(128):032x}", f"Epic Game {i}") for i in range(count)
+    ]
+
+
+def make_library(size, seed=0):
+    """Make `size` installed games and the shortcuts of a Steam library.
+
+    Like the fixtures, a tenth of the games has no shortcut yet and a
+    tenth of the shortcuts are of uninstalled games, followed by custom
+    ones. Returns `(shortcuts, games)`.
+    """
+
+    rng = Random(seed)
+    library = [("gog", id, name) for id, name in _get_gog_games(size // 2, rng)]
+    library += [
+        ("epic", id, name)
+        for id, name in _get_epic_games(size - size // 2, rng)
+    ]
+    rng.shuffle(library)
+    games = [
+        Game(platform, id, name, f"C:\\Games\\{name}\\game.exe")
+        for platform, id, name in library
+    ]
+
+    installed = library[: size * 9 // 10]
+    uninstalled = [
+        ("gog", str(2000000000 + i), f"Uninstalled {i}")
+        for i in range(size // 10)
+    ]
+    shortcuts = [
+        create_shortcut(
+            name,
+            f"C:\\Games\\{name}\\game.exe",
+            devkit_game_id=id,
+            last_play_time=rng.randrange(10**9),
+            tags=[platform],
+        )
+        for platform, id, name in installed + uninstalled
+    ]
+    shortcuts += [
+        create_shortcut(f"Custom {i}", f"C:\\Tools\\tool{i}.exe")
+        for i in range(max(1, size // 20))
+    ]
+    return shortcuts, games
+
+
+def make_gog_library(program_data, library_path, games):
+    """Write a GOG Galaxy config and a `goggame-*.info` file per game."""
+
+    config_path = Path(program_data) / "GOG.com" / "Galaxy" / "config.json"
+    config_path.parent.mkdir(parents=True, exist_ok=True)
+    config_path.write_text(json_dump({"libraryPath": str(library_path)}))
+
+    for game_id, name in games:
+        game_path = Path(library_path) / name
+        game_path.mkdir(parents=True, exist_ok=True)
+        info = {
+            "gameId": game_id,
+            "rootGameId": game_id,
+            "name": name,
+            "playTasks": [
+                {"isPrimary": True, "path": "bin\\game.exe", "type": "FileTask"}
+            ],
+        }
+        (game_path / f"goggame-{game_id}.info").write_text(json_dump(info))
+
+
+def make_epic_manifests(program_data, games):
+    """Write an EGL `.item` manifest per game."""
+
+    manifests_path = (
+        Path(program_data) / "Epic" / "EpicGamesLauncher" / "Data" / "Manifests"
+    )
+    manifests_path.mkdir(parents=True, exist_ok=True)
+
+    for catalog_id, name in games:
+        manifest = {
+            "AppName": catalog_id[:16],
+            "CatalogItemId": catalog_id,
+            "CatalogNamespace": catalog_id[16:],
+            "DisplayName": name,
+            "InstallLocation": f"C:\\Epic Games\\{name}",
+            "LaunchExecutable": "Binaries\\Win64\\game.exe",
+        }
+        (manifests_path / f"{catalog_id.upper()}.item").write_text(
+            json_dump(manifest, indent=4)
+        )
+
+
+def _make_localconfig(name, size, rng):
+    """Make a `localconfig.vdf` with `size` bytes of apps before the
+    profile name, as in the files of users with large libraries."""
+
+    apps, apps_size = [], 0
+    while apps_size < size:
+        app = (
+            f'\t\t\t"{rng.randrange(10**7)}"\n\t\t\t{{\n'
+            f'\t\t\t\t"LastPlayed"\t\t"{rng.randrange(10**9)}"\n'
+            f'\t\t\t\t"Playtime"\t\t"{rng.randrange(10**4)}"\n'
+            f"\t\t\t}}\n"
+        )
+        apps.append(app)
+        apps_size += len(app)
+
+    return (
+        '"UserLocalConfigStore"\n{\n'
+        '\t"Software"\n\t{\n\t\t"Valve"\n\t\t{\n'
+        '\t\t"apps"\n\t\t{\n' + "".join(apps) + "\t\t}\n\t\t}\n\t}\n"
+        f'\t"friends"\n\t{{\n\t\t"PersonaName"\t\t"{name}"\n\t}}\n'
+        "}\n"
+    )
+
+
+def make_steam_userdata(userdata_path, users, shortcuts, localconfig_size):
+    """Write the `localconfig.vdf` and `shortcuts.vdf` of Steam users.
+
+    Each user has the given `(platform, id, name)` shortcuts, followed
+    by a few custom ones. Returns the IDs of the users.
+    """
+
+    rng = Random(len(shortcuts))
+    user_ids = []
+    for i in range(users):
+        user_id = str(10000000 + i)
+        config_path = Path(userdata_path) / user_id / "config"
+        config_path.mkdir(parents=True, exist_ok=True)
+
+        (config_path / "localconfig.vdf").write_text(
+            _make_localconfig(f"User {i}", localconfig_size, rng),
+            encoding="utf-8",
+        )
+
+        entries = [
+            create_shortcut(
+                name,
+                f"C:\\Games\\{name}\\game.exe",
+                devkit_game_id=game_id,
+                last_play_time=rng.randrange(10**9),
+                tags=[platform],
+            )
+            for platform, game_id, name in shortcuts
+        ]
+        entries += [
+            create_shortcut(f"Custom {j}", f"C:\\Tools\\tool{j}.exe")
+            for j in range(max(1, len(shortcuts) // 20))
+        ]
+        (config_path / "shortcuts.vdf").write_bytes(
+            vdf_dump({"shortcuts": {str(j): s for j, s in enumerate(entries)}})
+        )
+        user_ids.append(user_id)
+
+    return user_ids
+
+
+def make_fixtures(
+    root,
+    users=4,
+    gog_games=500,
+    epic_games=500,
+    localconfig_size=512 * 1024,
+    seed=0,
+):
+    """Make a synthetic Steam, GOG Galaxy and EGL install under `root`.
+
+    Returns the environment variables to point the app's paths to it.
+    Every installed game already has a shortcut, except for a tenth of
+    them, and a tenth of the shortcuts are of uninstalled games.
+    """
+
+    root = Path(root)
+    rng = Random(seed)
+    program_files = root / "Program Files (x86)"
+    program_data = root / "ProgramData"
+    local_app_data = root / "AppData" / "Local"
+    local_app_data.mkdir(parents=True, exist_ok=True)
+
+    gog = _get_gog_games(gog_games, rng)
+    epic = _get_epic_games(epic_games, rng)
+    make_gog_library(program_data, root / "GOG Games", gog)
+    make_epic_manifests(program_data, epic)
+
+    shortcuts = [("gog", id, name) for id, name in gog]
+    shortcuts += [("epic", id, name) for id, name in epic]
+    rng.shuffle(shortcuts)
+    installed = len(shortcuts) * 9 // 10
+    shortcuts = shortcuts[:installed] + [
+        ("gog", str(2000000000 + i), f"Uninstalled {i}")
+        for i in range(len(shortcuts) // 10)
+    ]
+    make_steam_userdata(
+        program_files / "Steam" / "userdata",
+        users,
+        shortcuts,
+        localconfig_size,
+    )
+
+    return {
+        ENV_PROGRAM_FILES: str(program_files),
+        ENV_PROGRAM_DATA: str(program_data),
+        ENV_LOCAL_APP_DATA: str(local_app_data),
+    }
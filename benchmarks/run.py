@@ -0,0 +1,347 @@
+"""Benchmark the app against a synthetic Steam, GOG Galaxy and EGL
+install.
+
+    python -m benchmarks.run --gog-games 2000 --output results.json
+    python -m benchmarks.run --baseline results.json
+
+The fixtures are generated in a temporary directory and the app's
+Windows paths are pointed to it through their environment variables,
+which are expanded on any OS.
+Results are saved as JSON, and compared to a previous run's results with
+`--baseline`, exiting with an error on regressions. The run also fails
+when the CLI imports too slowly or when reconciling shortcuts doesn't
+scale about linearly with the size of the library.
+"""
+
+import re
+import subprocess
+import sys
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from io import StringIO
+from json import dumps as json_dump
+from json import loads as json_parse
+from os import environ
+from pathlib import Path
+from platform import platform, python_version
+from statistics import mean, median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from click import FloatRange, IntRange, Path as PathType, command, echo
+from click import option, style
+
+from benchmarks.fixtures import ENV_PROGRAM_FILES, make_fixtures, make_library
+
+# Sizes of the synthetic libraries shortcuts are reconciled with, the
+# growth of the time from the smallest to the largest is checked
+RECONCILE_SIZES = (10000, 100000)
+
+# Modules the CLI entry points import on startup
+STARTUP_MODULES = ("esg.cli", "esg.scripts")
+
+_IMPORT_TIME_RE = re.compile(r"import time:\s*\d+\s*\|\s*(\d+)\s*\|\s*(\S+)")
+
+
+def measure(func, repeat, setup=None):
+    """Time `repeat` calls of a function, in seconds."""
+
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = perf_counter()
+        func()
+        times.append(perf_counter() - start)
+    return {
+        "runs": repeat,
+        "min": min(times),
+        "median": median(times),
+        "mean": mean(times),
+    }
+
+
+def measure_import(module, repeat):
+    """Time the import of a module in a new interpreter, with the
+    `-X importtime` cumulative time of the module itself."""
+
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stderr
+        for match in _IMPORT_TIME_RE.finditer(output):
+            if match.group(2) == module:
+                times.append(int(match.group(1)) / 1e6)
+    return {
+        "runs": repeat,
+        "min": min(times),
+        "median": median(times),
+        "mean": mean(times),
+    }
+
+
+# ----------------------------------------------------------------------
+# Benchmarks
+# ----------------------------------------------------------------------
+def run_benchmarks(user_ids, userdata_path, repeat):
+    # imported after the environment is set up, some paths are expanded
+    # on import
+    from esg.main import get_installed_games
+    from esg.scripts import cli
+    from esg.state import ManifestState
+    from esg.steam import get_shortcuts_path, load_shortcuts, save_shortcuts
+    from esg.steam.profiles import SteamProfiles
+
+    user_id = user_ids[0]
+    results = {}
+
+    results["load_shortcuts"] = measure(lambda: load_shortcuts(user_id), repeat)
+
+    shortcuts = load_shortcuts(user_id)
+    results["save_shortcuts (unchanged)"] = measure(
+        lambda: save_shortcuts(user_id, shortcuts), repeat
+    )
+
+    def change_shortcuts():
+        for shortcut in shortcuts["shortcuts"].values():
+            shortcut["LastPlayTime"] += 1
+
+    results["save_shortcuts (changed)"] = measure(
+        lambda: save_shortcuts(user_id, shortcuts), repeat, change_shortcuts
+    )
+
+    results.update(benchmark_codec(get_shortcuts_path(user_id), repeat))
+
+    results["SteamProfiles"] = measure(
+        lambda: SteamProfiles(userdata_path).list(), repeat
+    )
+
+    results["get_installed_games"] = measure(
+        lambda: list(get_installed_games()), repeat
+    )
+
+    state = ManifestState()
+    list(get_installed_games(state))
+    results["get_installed_games (incremental)"] = measure(
+        lambda: list(get_installed_games(state)), repeat
+    )
+
+    def sync_shortcuts():
+        with redirect_stdout(StringIO()):
+            cli.main(["--all-users", "sync-shortcuts"], standalone_mode=False)
+
+    results["sync_shortcuts"] = measure(sync_shortcuts, repeat)
+
+    return results
+
+
+def benchmark_codec(shortcuts_path, repeat):
+    """Time the shortcuts codec against the `vdf` package's."""
+
+    import vdf
+
+    from esg.steam.shortcuts import dumps, loads
+
+    data = Path(shortcuts_path).read_bytes()
+    shortcuts = loads(data)
+    vdf_shortcuts = vdf.binary_loads(data)
+    return {
+        "shortcuts.loads": measure(lambda: loads(data), repeat),
+        "vdf.binary_loads": measure(lambda: vdf.binary_loads(data), repeat),
+        "shortcuts.dumps": measure(lambda: dumps(shortcuts), repeat),
+        "vdf.binary_dumps": measure(
+            lambda: vdf.binary_dumps(vdf_shortcuts), repeat
+        ),
+    }
+
+
+def benchmark_reconcile(sizes, repeat):
+    """Time the reconciliation of synthetic libraries of each size."""
+
+    from esg.reconcile import reconcile_shortcuts
+
+    results = {}
+    for size in sizes:
+        shortcuts, games = make_library(size)
+        results[f"reconcile_shortcuts ({size})"] = measure(
+            lambda: reconcile_shortcuts(shortcuts, games, {"gog", "epic"}),
+            repeat,
+        )
+    return results
+
+
+def get_reconcile_growth(results, sizes):
+    """Get how much faster than linearly the reconciliation time grows
+    from the smallest to the largest library, 1 when it's linear."""
+
+    small, large = min(sizes), max(sizes)
+    small_time = results[f"reconcile_shortcuts ({small})"]["median"]
+    large_time = results[f"reconcile_shortcuts ({large})"]["median"]
+    return (large_time / small_time) / (large / small)
+
+
+def compare_results(results, baseline, threshold):
+    """Print the change of each benchmark's median time from a baseline.
+
+    Returns the names of the benchmarks slower than `threshold` times
+    their baseline.
+    """
+
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["median"] / baseline[name]["median"]
+        message = f"{name}: {ratio:.2f}x"
+        if ratio > threshold:
+            regressions.append(name)
+            echo(style(message, fg="red"))
+        else:
+            echo(message)
+    return regressions
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+@command()
+@option("--users", type=IntRange(min=1), default=4, show_default=True)
+@option("--gog-games", type=IntRange(min=0), default=500, show_default=True)
+@option("--epic-games", type=IntRange(min=0), default=500, show_default=True)
+@option(
+    "--localconfig-size",
+    type=IntRange(min=0),
+    default=512,
+    show_default=True,
+    help="Size of each localconfig.vdf, in KiB.",
+)
+@option("--repeat", type=IntRange(min=1), default=5, show_default=True)
+@option(
+    "--import-budget",
+    type=FloatRange(min=0),
+    default=0.15,
+    show_default=True,
+    help="Maximum import time of the CLI entry points, in seconds.",
+)
+@option(
+    "--growth-budget",
+    type=FloatRange(min=1),
+    default=4,
+    show_default=True,
+    help="Maximum growth of the reconciliation time over linear.",
+)
+@option("--output", type=PathType(dir_okay=False), help="Save the results.")
+@option(
+    "--baseline",
+    type=PathType(exists=True, dir_okay=False),
+    help="Results of a previous run to compare to.",
+)
+@option(
+    "--threshold",
+    type=FloatRange(min=1),
+    default=1.2,
+    show_default=True,
+    help="Slowdown from the baseline reported as a regression.",
+)
+def main(
+    users,
+    gog_games,
+    epic_games,
+    localconfig_size,
+    repeat,
+    import_budget,
+    growth_budget,
+    output,
+    baseline,
+    threshold,
+):
+    """Run the benchmarks on synthetic launcher and Steam files."""
+
+    params = {
+        "users": users,
+        "gog_games": gog_games,
+        "epic_games": epic_games,
+        "localconfig_size": localconfig_size,
+        "repeat": repeat,
+    }
+
+    results = {}
+    for module in STARTUP_MODULES:
+        results[f"import {module}"] = measure_import(module, repeat)
+
+    with TemporaryDirectory(prefix="esg-bench-") as root:
+        env = make_fixtures(
+            root,
+            users=users,
+            gog_games=gog_games,
+            epic_games=epic_games,
+            localconfig_size=localconfig_size * 1024,
+        )
+        environ.update(env)
+        userdata_path = Path(env[ENV_PROGRAM_FILES]) / "Steam" / "userdata"
+        user_ids = sorted(p.name for p in userdata_path.iterdir())
+        results.update(run_benchmarks(user_ids, userdata_path, repeat))
+
+    results.update(benchmark_reconcile(RECONCILE_SIZES, repeat))
+
+    for name, result in results.items():
+        echo(
+            f"{name}: {result['median'] * 1000:.2f}ms median, "
+            f"{result['min'] * 1000:.2f}ms min"
+        )
+
+    failed = False
+    for module in STARTUP_MODULES:
+        import_time = results[f"import {module}"]["median"]
+        if import_time > import_budget:
+            failed = True
+            echo(
+                style(
+                    f"import {module} took {import_time * 1000:.0f}ms, "
+                    f"over the {import_budget * 1000:.0f}ms budget",
+                    fg="red",
+                )
+            )
+
+    # a quadratic reconciliation grows as much as the library does
+    growth = get_reconcile_growth(results, RECONCILE_SIZES)
+    if growth > growth_budget:
+        failed = True
+        echo(
+            style(
+                f"reconcile_shortcuts grew {growth:.1f}x faster than "
+                f"linearly, over the {growth_budget:g}x budget",
+                fg="red",
+            )
+        )
+
+    if output:
+        Path(output).write_text(
+            json_dump(
+                {
+                    "created": datetime.now(timezone.utc).isoformat(),
+                    "python": python_version(),
+                    "platform": platform(),
+                    "params": params,
+                    "results": results,
+                },
+                indent=2,
+            )
+        )
+
+    if baseline:
+        echo()
+        baseline_results = json_parse(Path(baseline).read_text())["results"]
+        if compare_results(results, baseline_results, threshold):
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
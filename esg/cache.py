@@ -0,0 +1,191 @@
+from hashlib import sha256
+from json import dumps as json_dump
+from json import loads as json_parse
+from os import fdopen, replace
+from pathlib import Path
+from tempfile import mkstemp
+from threading import Lock
+from time import time
+
+from esg.http import get_session
+from esg.metrics import count, span
+from esg.util import atomic_write
+
+# Default maximum total size of the cached files
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Default time, in seconds, before a cached file is revalidated
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60
+
+
+class ArtworkCache:
+    """A persistent, content-addressed cache of downloaded artwork.
+
+    Files are stored by the SHA-256 hash of their content. An index file
+    maps each source URL to its file along with the HTTP validators
+    (`ETag`/`Last-Modified`), size, hash and last access time of the
+    entry.
+
+    Entries are served from disk without any network request until they
+    are `max_age` seconds old, after which they are revalidated with a
+    conditional request. `evict` removes the least recently used files
+    once the cache grows past `max_size` bytes.
+    """
+
+    INDEX_FILE = "index.json"
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        path,
+        max_size: int = DEFAULT_MAX_SIZE,
+        max_age: int = DEFAULT_MAX_AGE,
+        session=None,
+    ):
+        self._path = Path(path)
+        self._session = session or get_session()
+        self._index_path = self._path / self.INDEX_FILE
+        self._max_size = max_size
+        self._max_age = max_age
+        self._lock = Lock()
+        self._index = self._load_index()
+
+    def _load_index(self) -> dict:
+        try:
+            index = json_parse(self._index_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+        if not isinstance(index, dict):
+            return {}
+        return index
+
+    def _file_path(self, entry) -> Path:
+        return self._path / entry["sha256"]
+
+    def _is_intact(self, entry) -> bool:
+        try:
+            return self._file_path(entry).stat().st_size == entry["size"]
+        except FileNotFoundError:
+            return False
+
+    def fetch(self, url: str) -> Path:
+        """Get the path to the cached file of a URL.
+
+        The file is downloaded if it's not cached yet, or if the cached
+        copy is missing, incomplete or stale and has changed upstream.
+        Safe to call from multiple threads.
+        """
+
+        with self._lock:
+            entry = self._index.get(url)
+            if entry and not self._is_intact(entry):
+                entry = None
+            if entry and time() - entry["validated"] < self._max_age:
+                entry["accessed"] = time()
+                count("artwork.cache.hit")
+                return self._file_path(entry)
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        with span("artwork.download", url=url):
+            with self._session.get(url, headers=headers, stream=True) as res:
+                if res.status_code == 304 and entry:
+                    with self._lock:
+                        entry["validated"] = entry["accessed"] = time()
+                    count("artwork.cache.revalidated")
+                    return self._file_path(entry)
+                res.raise_for_status()
+
+                count("artwork.cache.miss")
+                digest, size = self._download(res)
+                new_entry = {
+                    "url": url,
+                    "etag": res.headers.get("ETag"),
+                    "last_modified": res.headers.get("Last-Modified"),
+                    "size": size,
+                    "sha256": digest,
+                    "accessed": time(),
+                    "validated": time(),
+                }
+
+        with self._lock:
+            self._index[url] = new_entry
+        return self._file_path(new_entry)
+
+    def invalidate(self, url: str):
+        """Drop the entry of a URL, e.g. when its file turned out not to
+        be a usable image, so that it's downloaded again by the next
+        `fetch`."""
+
+        with self._lock:
+            self._index.pop(url, None)
+
+    def _download(self, res):
+        """Stream a response into the cache, returning its hash & size.
+
+        The content is written to a temporary file that is then renamed
+        to its hash, so a partial download never ends up in the cache.
+        """
+
+        fd, temp_path = mkstemp(dir=self._path, suffix=".tmp")
+        try:
+            digest = sha256()
+            size = 0
+            with fdopen(fd, "wb") as temp_file:
+                for chunk in res.iter_content(self.CHUNK_SIZE):
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+                    size += len(chunk)
+            replace(temp_path, self._path / digest.hexdigest())
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        return digest.hexdigest(), size
+
+    def evict(self):
+        """Evict least recently used entries over the size limit.
+
+        Also removes files that no index entry refers to anymore, such
+        as interrupted downloads or replaced content. Returns the list
+        of removed paths.
+        """
+
+        removed = []
+        with self._lock:
+            entries = sorted(
+                self._index.items(),
+                key=lambda item: item[1]["accessed"],
+                reverse=True,
+            )
+
+            # keep the most recently used entries that fit in the cache
+            kept, total_size = {}, 0
+            for url, entry in entries:
+                if not self._is_intact(entry):
+                    continue
+                if total_size + entry["size"] > self._max_size:
+                    continue
+                kept[url] = entry
+                total_size += entry["size"]
+            self._index = kept
+
+            kept_files = {entry["sha256"] for entry in kept.values()}
+            for path in self._path.iterdir():
+                if path.name == self.INDEX_FILE or path.name in kept_files:
+                    continue
+                if path.is_file():
+                    path.unlink(missing_ok=True)
+                    removed.append(path)
+
+        return removed
+
+    def save(self):
+        """Write the cache index to disk."""
+
+        with self._lock:
+            index_json = json_dump(self._index, indent=2)
+        atomic_write(self._index_path, index_json.encode("utf-8"))
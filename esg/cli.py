@@ -2,30 +2,33 @@ import logging
 import platform
 import sys
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, List
 
 import click
-import psutil
 
+from .steam.process import find_steam_process, wait_for_exit
 from .steam.profiles import Profile, SteamProfiles
 from .steam.shortcuts import SteamShortcuts
 
+if TYPE_CHECKING:
+    import psutil
+
 
 # ----------------------------------------------------------------------
 #  Helpers
 # ----------------------------------------------------------------------
-def get_steam_process_info() -> psutil.Process | None:
-    steam_process = None
-    for proc in psutil.process_iter(["name"]):
-        if proc.info["name"] == "steam.exe":
-            return proc
-    if not steam_process:
-        return None
+def get_steam_process_info() -> "psutil.Process | None":
+    return find_steam_process()
+
 
+def wait_process_end(
+    process: "psutil.Process", timeout: float | None = None
+) -> bool:
+    def report_progress(elapsed):
+        logging.debug(f"Waiting for Steam to exit ({elapsed:.0f}s)")
 
-def wait_process_end(process: psutil.Process) -> None:
     try:
-        psutil.wait_procs([process])
+        return wait_for_exit(process, timeout, report_progress, interval=5)
     except KeyboardInterrupt:
         exit(1)
 
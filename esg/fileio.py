@@ -0,0 +1,47 @@
+from contextlib import contextmanager
+from json import loads as json_parse
+from mmap import ACCESS_READ, mmap
+from os import fstat
+
+# Files smaller than this, in bytes, are read at once, as mapping them
+# costs more than reading them
+MMAP_THRESHOLD = 64 * 1024
+
+
+@contextmanager
+def open_buffer(path, threshold: int = MMAP_THRESHOLD):
+    """Open a file as a read-only buffer, as a context manager.
+
+    Files of at least `threshold` bytes are memory-mapped, so decoders
+    read them in place instead of copying them into memory first,
+    smaller ones are read as `bytes`. Both support slicing, `find` and
+    regular expressions.
+
+    The file is unmapped and closed when the block exits, the buffer
+    must not be used after that. On Windows, a file can't be replaced
+    while it's open or mapped.
+    """
+
+    with open(path, "rb") as f:
+        size = fstat(f.fileno()).st_size
+        if not size or size < threshold:
+            yield f.read()
+            return
+
+        buffer = mmap(f.fileno(), 0, access=ACCESS_READ)
+        try:
+            yield buffer
+        finally:
+            try:
+                buffer.close()
+            except BufferError:
+                # still referenced, e.g. by the traceback of an error
+                # raised while decoding it, unmapped once released
+                pass
+
+
+def read_json(path):
+    """Read a JSON file, in any of the encodings JSON allows."""
+
+    with open_buffer(path) as data:
+        return json_parse(bytes(data))
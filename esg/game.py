@@ -0,0 +1,50 @@
+from pathlib import Path
+from sys import intern
+from typing import Iterable, Iterator, NamedTuple, Tuple, Union
+
+
+class _GameFields(NamedTuple):
+    platform: str
+    id: str
+    name: str
+    # path or URL that launches the game
+    exe_path: str
+    args: str
+    # path of the executable Steam takes the icon from, "" for none
+    icon_path: Union[Path, str]
+
+
+class Game(_GameFields):
+    """An installed game of a launcher.
+
+    Games are immutable and hashable tuples without an instance `dict`,
+    to stay small on large libraries. The platform name is interned, so
+    the games of a platform share a single string, including those
+    loaded back from the manifests state.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, platform, id, name, exe_path, args="", icon_path=""):
+        return super().__new__(
+            cls, intern(platform), id, name, exe_path, args, icon_path
+        )
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        """The `(platform, id)` a game is unique by."""
+
+        return (self.platform, self.id)
+
+
+def unique_games(games: Iterable[Game]) -> Iterator[Game]:
+    """Filter out games already seen with the same platform and ID.
+
+    Lazy, so it can be chained on discovery while it's still running.
+    """
+
+    seen = set()
+    for game in games:
+        if game.key not in seen:
+            seen.add(game.key)
+            yield game
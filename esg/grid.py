@@ -1,33 +1,94 @@
-from json import load as json_parse
-from urllib import request
-from urllib.error import HTTPError
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from hashlib import sha256
+from json import dumps as json_dump
+from json import loads as json_parse
+from math import ceil
+from os import cpu_count, getpid, replace
+from pathlib import Path
+from queue import Queue
+from time import perf_counter, time
+from typing import Dict, List, NamedTuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
+from esg.http import get_session
+from esg.metrics import count, get_metrics, span
+from esg.steam import GRID_VARIANTS, render_grids
+from esg.util import atomic_write, link_file
 
-def get_gog_stats(username):
-    """Get the GOG.com stats for a user."""
+# Base URL of the GOG.com website
+GOG_URL = "https://www.gog.com"
 
-    url = f"https://www.gog.com/u/{username}/games/stats"
+# Default time, in seconds, the GOG stats of a user are cached for
+DEFAULT_STATS_MAX_AGE = 24 * 60 * 60
 
-    req = request.Request(url, method="GET")
-    try:
-        res = request.urlopen(req)
-    except HTTPError as e:
-        if e.code == 404:
-            return None
-        else:
-            raise e
+# Default time, in seconds, an unlinked rendered grid image is kept for
+DEFAULT_STORE_MAX_AGE = 30 * 24 * 60 * 60
+
+
+def _get_stats_page(session, url):
+    with span("gog.stats.page", url=url):
+        res = session.get(url)
+        res.raise_for_status()
+        return res.json()
+
+
+def _get_page_url(url, page):
+    """Get the URL of another page of a paginated GOG API URL."""
+
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query["page"] = str(page)
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _get_page_count(stats_page):
+    if isinstance(stats_page.get("pages"), int):
+        return stats_page["pages"]
+    if stats_page.get("total") and stats_page.get("limit"):
+        return ceil(stats_page["total"] / stats_page["limit"])
+    return None
+
+
+def get_gog_stats(username, session=None, max_workers=4):
+    """Get the GOG.com stats for a user.
+
+    If the first page tells how many pages there are, the remaining ones
+    are fetched concurrently on up to `max_workers` threads. Otherwise
+    the `next` links are followed, one page at a time.
+    """
+
+    session = session or get_session()
+    url = f"{GOG_URL}/u/{username}/games/stats"
+
+    res = session.get(url)
+    if res.status_code == 404:
+        return None
+    res.raise_for_status()
 
-    stats_page = json_parse(res)
+    stats_page = res.json()
 
     stats = []
     stats += stats_page["_embedded"]["items"]
 
-    while stats_page["_links"].get("next"):
-        next_url = stats_page["_links"]["next"]["href"]
-        req = request.Request(next_url, method="GET")
-        res = request.urlopen(req)
-        stats_page = json_parse(res)
-        stats += stats_page["_embedded"]["items"]
+    next_link = stats_page["_links"].get("next")
+    page_count = _get_page_count(stats_page)
+    if next_link and page_count:
+        first_page = stats_page.get("page", 1)
+        page_urls = [
+            _get_page_url(next_link["href"], page)
+            for page in range(first_page + 1, page_count + 1)
+        ]
+        get_page = partial(_get_stats_page, session)
+        with ThreadPoolExecutor(max_workers) as executor:
+            for stats_page in executor.map(get_page, page_urls):
+                stats += stats_page["_embedded"]["items"]
+    else:
+        # each page's link is only known from the previous page
+        while next_link:
+            stats_page = _get_stats_page(session, next_link["href"])
+            next_link = stats_page["_links"].get("next")
+            stats += stats_page["_embedded"]["items"]
 
     games = {}
     for item in stats:
@@ -36,3 +97,182 @@ def get_gog_stats(username):
         del game["id"]
 
     return games
+
+
+def get_cached_gog_stats(
+    username,
+    cache_path,
+    max_age=DEFAULT_STATS_MAX_AGE,
+    session=None,
+    dry_run=False,
+):
+    """Get the GOG.com stats for a user, cached on disk for `max_age`
+    seconds. With `dry_run`, the cache is read but not written."""
+
+    stats_path = Path(cache_path) / f"gog-stats-{username}.json"
+    try:
+        cached = json_parse(stats_path.read_text(encoding="utf-8"))
+        if time() - cached["fetched"] < max_age:
+            count("gog.stats.cache.hit")
+            return cached["games"]
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        pass
+
+    count("gog.stats.cache.miss")
+    with span("gog.stats", username=username):
+        games = get_gog_stats(username, session)
+    if games is not None and not dry_run:
+        stats_path.parent.mkdir(parents=True, exist_ok=True)
+        cached = {"fetched": time(), "games": games}
+        atomic_write(stats_path, json_dump(cached).encode("utf-8"))
+    return games
+
+
+# ----------------------------------------------------------------------
+# Grid images pipeline
+# ----------------------------------------------------------------------
+class GridJob(NamedTuple):
+    """A source image to download and render into grid variants."""
+
+    name: str
+    url: str
+    # grid variant names mapped to the paths to save them to
+    targets: Dict[str, List[Path]]
+
+
+class GridStore:
+    """A content-addressed store of rendered grid images.
+
+    Each variant of a source image is rendered once, under the hash of
+    the source's content and the variant's size, then linked to all of
+    its target paths, across Steam users and legacy file names. Targets
+    share the stored file's storage unless they are on another volume.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def _get_digest(self, source_path) -> str:
+        digest = sha256()
+        with open(source_path, "rb") as source_file:
+            for chunk in iter(lambda: source_file.read(self.CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def render(self, source_path, targets):
+        """Render the grid variants of a source image to their targets.
+
+        `targets` is a `GridJob.targets` mapping. Only variants missing
+        from the store are rendered, in a single decode of the source.
+        """
+
+        digest = self._get_digest(source_path)
+        stored_paths, renders = {}, {}
+        for variant, paths in targets.items():
+            if not paths:
+                continue
+            width, height = GRID_VARIANTS[variant].size
+            suffix = Path(paths[0]).suffix
+            stored_path = self.path / f"{digest}_{width}x{height}{suffix}"
+            stored_paths[variant] = stored_path
+            if not stored_path.is_file():
+                # rendered under a temporary name, with the same suffix
+                # for the image format, until complete
+                renders[variant] = [
+                    stored_path.with_name(f".{getpid()}.{stored_path.name}")
+                ]
+
+        if renders:
+            try:
+                render_grids(source_path, renders)
+                for variant, (temp_path,) in renders.items():
+                    replace(temp_path, stored_paths[variant])
+            finally:
+                for (temp_path,) in renders.values():
+                    temp_path.unlink(missing_ok=True)
+
+        for variant, stored_path in stored_paths.items():
+            for path in targets[variant]:
+                link_file(stored_path, path)
+
+    def prune(self, max_age: int = DEFAULT_STORE_MAX_AGE):
+        """Remove stored images no target is linked to anymore.
+
+        Images copied to their targets, rather than linked, can't be
+        told apart from unused ones, so they are only removed once they
+        are older than `max_age` seconds. Returns the removed paths.
+        """
+
+        removed = []
+        for path in self.path.iterdir():
+            stat = path.stat()
+            if stat.st_nlink > 1 or time() - stat.st_mtime < max_age:
+                continue
+            path.unlink(missing_ok=True)
+            removed.append(path)
+        return removed
+
+
+def _render_grid_job(store_path, source_path, targets):
+    GridStore(store_path).render(source_path, targets)
+
+
+def process_grid_jobs(jobs, cache, store, max_jobs=4):
+    """Download and resize the source images of grid jobs.
+
+    Source images are fetched through the `cache` artwork cache, and
+    rendered into the `store` grid store.
+    Downloads run concurrently on up to `max_jobs` threads. Each
+    downloaded image is handed to a pool of worker processes, one per
+    CPU core, that decodes it once and renders all of its variants, so
+    imaging overlaps with the remaining network fetches.
+
+    Yields a `(job, error)` tuple for every job as soon as it is done,
+    `error` being `None` on success. A failed job does not stop the
+    others. The source image of a job that fails to render is dropped
+    from the cache, so that it's downloaded again by the next run.
+    """
+
+    jobs = list(jobs)
+    if not jobs:
+        return
+
+    resize_workers = max(1, min(len(jobs), cpu_count() or 1))
+    results = Queue()
+
+    with ThreadPoolExecutor(max_jobs) as downloader, ProcessPoolExecutor(
+        resize_workers
+    ) as resizer:
+
+        def on_resized(job, start, future):
+            error = future.exception()
+            if error:
+                cache.invalidate(job.url)
+            results.put((job, error))
+            get_metrics().record(
+                "grid.render", start, perf_counter() - start, game=job.name
+            )
+
+        def on_downloaded(job, future):
+            error = future.exception()
+            if error:
+                results.put((job, error))
+                return
+            start = perf_counter()
+            try:
+                resized = resizer.submit(
+                    _render_grid_job, store.path, future.result(), job.targets
+                )
+            except RuntimeError as error:  # pipeline shutting down
+                results.put((job, error))
+                return
+            resized.add_done_callback(partial(on_resized, job, start))
+
+        for job in jobs:
+            downloaded = downloader.submit(cache.fetch, job.url)
+            downloaded.add_done_callback(partial(on_downloaded, job))
+
+        for _ in range(len(jobs)):
+            yield results.get()
@@ -0,0 +1,114 @@
+from threading import Lock
+from time import perf_counter
+from typing import List, NamedTuple
+from urllib.parse import urlsplit
+
+# Responses worth retrying, the request itself was fine
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RequestTiming(NamedTuple):
+    """The timing of a single HTTP request."""
+
+    method: str
+    url: str
+    status: int
+    # seconds until the response headers were received
+    elapsed: float
+
+
+class HttpSession:
+    """An HTTP client shared by all of the app's requests.
+
+    Keeps connections alive in a pool per host, asks for gzip compressed
+    responses, retries failed requests with an exponential backoff and
+    records the timing of every request.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        timeout: float = 30,
+    ):
+        # requests takes longer to import than the rest of the CLI, only
+        # import it once a request is about to be made
+        from requests import Session
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=("GET", "HEAD"),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+
+        self._session = Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers["Accept-Encoding"] = "gzip, deflate"
+        self._timeout = timeout
+        self._timings: List[RequestTiming] = []
+        self._lock = Lock()
+
+    def get(self, url: str, headers=None, stream: bool = False):
+        """Send a GET request, returns a `requests.Response`.
+
+        With `stream`, the body is not read up-front and the response
+        must be closed once done with, e.g. in a `with` block.
+        """
+
+        start = perf_counter()
+        res = self._session.get(
+            url, headers=headers, stream=stream, timeout=self._timeout
+        )
+        timing = RequestTiming(
+            "GET", url, res.status_code, perf_counter() - start
+        )
+        with self._lock:
+            self._timings.append(timing)
+        return res
+
+    def timings(self) -> List[RequestTiming]:
+        with self._lock:
+            return list(self._timings)
+
+    def summary(self) -> dict:
+        """Get the number of requests and their total and slowest
+        times, by host."""
+
+        hosts = {}
+        for timing in self.timings():
+            host = urlsplit(timing.url).netloc
+            stats = hosts.setdefault(
+                host, {"requests": 0, "total": 0.0, "slowest": 0.0}
+            )
+            stats["requests"] += 1
+            stats["total"] += timing.elapsed
+            stats["slowest"] = max(stats["slowest"], timing.elapsed)
+        return hosts
+
+    def close(self):
+        self._session.close()
+
+
+_session = None
+_session_lock = Lock()
+
+
+def get_session() -> HttpSession:
+    """Get the default session, shared across the app."""
+
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = HttpSession()
+        return _session
@@ -1,108 +1,229 @@
-from json import load as json_parse
-from os.path import expandvars
-from pathlib import Path
-from urllib.parse import quote, urlencode
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from queue import SimpleQueue
+from threading import Thread
+from time import monotonic
 
-from esg.game import Game
+from esg.metrics import span
+from esg.platforms import get_providers
 
 
-# ----------------------------------------------------------------------
-# GOG Galaxy
-# ----------------------------------------------------------------------
-def _get_installed_gog_games():
-    """Get installed GOG games."""
-
-    # GOG Galaxy launcher path
-    GALAXY_PATH = "%ProgramFiles(x86)%\\GOG Galaxy\\GalaxyClient.exe"
-
-    # Get the game library path
-    GALAXY_CONFIG_PATH = "%ProgramData%\\GOG.com\\Galaxy\\config.json"
-    config = json_parse(open(expandvars(GALAXY_CONFIG_PATH)))
-    library_path = Path(config["libraryPath"])
-
-    # Get the list of installed games info files
-    info_files = library_path.glob(".\\*\\goggame-*.info")
-
-    games = []
-    for info_file in info_files:
-        info = json_parse(open(info_file))
-
-        # Get the game's pwd & icon path
-        pwd = str(info_file.parent)
-        for task in info["playTasks"]:
-            if task.get("isPrimary", False):
-                # Use the actual game exe for the icon path
-                icon_path = info_file.parent / task["path"]
-
-                # if primary task has a pwd use it instead
-                if task.get("workingDir", False):
-                    pwd = str(info_file.parent / task["workingDir"])
-                    break
-
-        args = f'/command=runGame /gameId={info["gameId"]} /path="{pwd}"'
-
-        # Ignore DLCs
-        if info["gameId"] != info["rootGameId"]:
-            continue
-
-        game = Game(
-            platform="gog",
-            id=info["gameId"],
-            name=info["name"],
-            exe_path=expandvars(GALAXY_PATH),
-            args=args,
-            icon_path=icon_path,
-        )
-
-        games.append(game)
-
-    return games
-
-
-# ----------------------------------------------------------------------
-# Epic Games
-# ----------------------------------------------------------------------
-def _get_installed_epic_games():
-    """Get installed Epic games."""
-
-    # Get the list of installed games manifests
-    MANIFESTS_PATH = "%ProgramData%\\Epic\\EpicGamesLauncher\\Data\\Manifests"
-    manifest_files = Path(expandvars(MANIFESTS_PATH)).glob(".\\*.item")
-
-    games = []
-    for manifest_file in manifest_files:
-        manifest = json_parse(open(manifest_file))
-
-        # Prepare launcher url
-        protocol = "com.epicgames.launcher://"
-        base_path = "apps"
-        namespace = manifest["CatalogNamespace"]
-        id = manifest["CatalogItemId"]
-        name = manifest["AppName"]
-        query = urlencode({"action": "launch", "silent": "true"})
-        path = quote(f"{base_path}/{namespace}:{id}:{name}")
-        launcher_url = f"{protocol}{path}?{query}"
+def _list_manifests(provider):
+    with span("manifests.list", launcher=provider.platform):
+        return provider.list_manifests()
 
-        # Prepare icon path
-        install_path = manifest["InstallLocation"]
-        icon_path = Path(install_path) / manifest["LaunchExecutable"]
 
-        game = Game(
-            platform="epic",
-            id=manifest["CatalogItemId"],
-            name=manifest["DisplayName"],
-            exe_path=launcher_url,
-            args="",
-            icon_path=icon_path,
-        )
+def _parse_manifest(manifest_path, parser, state):
+    with span("manifest.parse", path=manifest_path):
+        if state is None:
+            return parser(manifest_path)
+        return state.parse(manifest_path, parser)
 
-        games.append(game)
 
-    return games
+def _report_error(on_error, provider, error):
+    if on_error is None:
+        raise error
+    on_error(provider, error)
 
 
 # ----------------------------------------------------------------------
 # Exports
 # ----------------------------------------------------------------------
-def get_installed_games():
-    return _get_installed_gog_games() + _get_installed_epic_games()
+class DaemonExecutor:
+    """A pool of threads that calls functions in the background.
+
+    Unlike a `ThreadPoolExecutor`, its threads are daemon threads that
+    are not waited for when the interpreter exits, so a launcher that
+    hangs past its timeout doesn't keep the CLI running.
+    """
+
+    def __init__(self, max_workers: int):
+        self._max_workers = max_workers
+        self._workers = 0
+        self._calls = SimpleQueue()
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        self._calls.put((future, fn, args))
+        if self._workers < self._max_workers:
+            self._workers += 1
+            Thread(target=self._work, daemon=True).start()
+        return future
+
+    def shutdown(self):
+        """Stop the threads once they are done with the submitted calls,
+        without waiting for them."""
+
+        for _ in range(self._workers):
+            self._calls.put(None)
+
+    def _work(self):
+        while True:
+            call = self._calls.get()
+            if call is None:
+                return
+            future, fn, args = call
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args)
+            except BaseException as error:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+def get_provider_result(future, provider, timeout=None):
+    """Wait for the result of a provider's call, up to `timeout` seconds
+    or the provider's own timeout."""
+
+    if timeout is None:
+        timeout = provider.timeout
+    try:
+        return future.result(max(0, timeout))
+    except FuturesTimeoutError:
+        future.cancel()
+        raise TimeoutError(
+            f"{provider.platform} took longer than {provider.timeout}s"
+        ) from None
+
+
+def get_installed_games(
+    state=None, max_workers=8, providers=None, on_error=None
+):
+    """Get installed games from all launchers.
+
+    Yields the games of each of the `providers`, all registered ones by
+    default, in order. The launchers' directories are listed and their
+    manifests are read and parsed concurrently on up to `max_workers`
+    threads. Games are yielded as soon as they are ready, each
+    launcher's in the order of their manifest paths, so the output
+    order does not depend on which manifest is parsed first.
+
+    Only a few manifests are parsed ahead of the caller, so memory use
+    does not grow with the size of the library and callers can filter
+    or reconcile the games while discovery is still running.
+
+    If a `ManifestState` is given, only manifests that changed since the
+    last run are parsed, the games of the others come from the state.
+
+    A launcher that fails, or that is waited on for longer than its
+    provider's timeout in all to list and parse its manifests, is
+    skipped and reported to `on_error` with the provider and the error.
+    The error is raised if `on_error` is not given.
+    """
+
+    if providers is None:
+        providers = get_providers()
+    max_pending = max_workers * 4
+    # seconds left to wait on each launcher
+    time_left = {provider: provider.timeout for provider in providers}
+
+    def get_result(provider, future):
+        start = monotonic()
+        try:
+            return get_provider_result(future, provider, time_left[provider])
+        finally:
+            time_left[provider] -= monotonic() - start
+
+    def get_game(provider, parsed_game):
+        if provider in failed:
+            return None
+        try:
+            return get_result(provider, parsed_game)
+        except Exception as error:
+            if isinstance(error, TimeoutError):
+                failed.add(provider)
+            _report_error(on_error, provider, error)
+            return None
+
+    executor = DaemonExecutor(max_workers)
+    failed = set()
+    pending = deque()
+    try:
+        # list all launchers at once, parse as soon as one is listed
+        listings = [
+            executor.submit(_list_manifests, provider) for provider in providers
+        ]
+
+        # yield in submission order to keep the output deterministic
+        for provider, listing in zip(providers, listings):
+            try:
+                manifest_paths = get_result(provider, listing)
+            except Exception as error:
+                failed.add(provider)
+                _report_error(on_error, provider, error)
+                continue
+
+            for manifest_path in manifest_paths:
+                if len(pending) >= max_pending:
+                    game = get_game(*pending.popleft())
+                    if game:
+                        yield game
+                parsed_game = executor.submit(
+                    _parse_manifest,
+                    manifest_path,
+                    provider.parse_manifest,
+                    state,
+                )
+                pending.append((provider, parsed_game))
+
+        while pending:
+            game = get_game(*pending.popleft())
+            if game:
+                yield game
+    finally:
+        # don't wait for launchers that timed out
+        for _, parsed_game in pending:
+            parsed_game.cancel()
+        executor.shutdown()
+
+
+def get_artwork_urls(game_ids, options, providers=None):
+    """Get the source grid image URLs of games from all launchers.
+
+    `game_ids` maps platforms to the IDs of their games. The providers
+    of all platforms are looked up at the same time, each for up to its
+    own timeout, so a slow launcher does not hold up the others.
+
+    Yields a `(platform, urls, error)` tuple for each platform, in the
+    order of `game_ids`, `urls` mapping game IDs to image URLs and
+    `error` being `None` on success.
+    """
+
+    if providers is None:
+        providers = get_providers()
+    providers = {provider.platform: provider for provider in providers}
+
+    executor = DaemonExecutor(max(1, len(game_ids)))
+    try:
+        start = monotonic()
+        lookups = {}
+        for platform, ids in game_ids.items():
+            provider = providers.get(platform)
+            if provider:
+                lookups[platform] = executor.submit(
+                    provider.get_artwork_urls, ids, options
+                )
+
+        for platform in game_ids:
+            if platform not in lookups:
+                error = LookupError(f"No provider for {platform} games")
+                yield platform, {}, error
+                continue
+
+            provider = providers[platform]
+            try:
+                urls = get_provider_result(
+                    lookups[platform],
+                    provider,
+                    provider.timeout - (monotonic() - start),
+                )
+            except Exception as error:
+                yield platform, {}, error
+                continue
+            yield platform, urls, None
+    finally:
+        # don't wait for launchers that timed out
+        executor.shutdown()
@@ -0,0 +1,153 @@
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from json import dumps as json_dump
+from os import getpid
+from threading import Lock, get_ident
+from time import perf_counter
+from typing import NamedTuple
+
+_NULL_SPAN = nullcontext()
+
+
+class Span(NamedTuple):
+    """A timed stage of the pipeline."""
+
+    name: str
+    # seconds since the metrics were enabled
+    start: float
+    duration: float
+    thread: int
+    args: dict
+
+
+class Metrics:
+    """Timing spans and counters of the app's pipeline stages.
+
+    Recording is off until `enable` is called, until then `span` and
+    `count` do nothing so instrumented code pays close to no cost.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._origin = perf_counter()
+        self._spans = []
+        self._counters = Counter()
+        self._lock = Lock()
+
+    def enable(self):
+        self.enabled = True
+        self._origin = perf_counter()
+
+    def span(self, name: str, **args):
+        """Time a block of code, as a context manager.
+
+        `args` are extra details shown in trace files, e.g. the URL of a
+        download.
+        """
+
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name, args)
+
+    @contextmanager
+    def _span(self, name, args):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, perf_counter() - start, **args)
+
+    def record(self, name: str, start: float, duration: float, **args):
+        """Record a span timed elsewhere, `start` is a `perf_counter`
+        time."""
+
+        if not self.enabled:
+            return
+        span = Span(name, start - self._origin, duration, get_ident(), args)
+        with self._lock:
+            self._spans.append(span)
+
+    def count(self, name: str, value: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] += value
+
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def counters(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def summary(self) -> dict:
+        """Get the number of spans of each stage and their total, mean
+        and slowest times, in seconds."""
+
+        stages = {}
+        for span in self.spans():
+            stage = stages.setdefault(
+                span.name, {"count": 0, "total": 0.0, "max": 0.0}
+            )
+            stage["count"] += 1
+            stage["total"] += span.duration
+            stage["max"] = max(stage["max"], span.duration)
+        for stage in stages.values():
+            stage["mean"] = stage["total"] / stage["count"]
+        return stages
+
+    def to_json(self) -> str:
+        return json_dump(
+            {"stages": self.summary(), "counters": self.counters()}, indent=2
+        )
+
+    def to_trace(self) -> str:
+        """Get the spans in the Chrome trace event format, for
+        `chrome://tracing` or Perfetto."""
+
+        pid = getpid()
+        events = [
+            {
+                "name": span.name,
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread,
+                "args": {key: str(value) for key, value in span.args.items()},
+            }
+            for span in self.spans()
+        ]
+        events += [
+            {
+                "name": name,
+                "ph": "C",
+                "ts": (perf_counter() - self._origin) * 1e6,
+                "pid": pid,
+                "args": {name: value},
+            }
+            for name, value in self.counters().items()
+        ]
+        return json_dump({"traceEvents": events, "displayTimeUnit": "ms"})
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """Get the metrics shared across the app."""
+
+    return _metrics
+
+
+def span(name: str, **args):
+    """Time a block of code with the shared metrics."""
+
+    return _metrics.span(name, **args)
+
+
+def count(name: str, value: int = 1):
+    """Increment a counter of the shared metrics."""
+
+    _metrics.count(name, value)
@@ -0,0 +1,96 @@
+from importlib import import_module
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+)
+
+if TYPE_CHECKING:
+    from esg.game import Game
+    from esg.http import HttpSession
+
+# Default time, in seconds, to wait on a launcher's provider
+DEFAULT_PROVIDER_TIMEOUT = 120
+
+# Modules of the built-in providers, each has a `PROVIDER`
+BUILTIN_PROVIDERS = ("esg.platforms.gog", "esg.platforms.epic")
+
+
+class ArtworkOptions(NamedTuple):
+    """What providers may need to look up the grid images of games."""
+
+    # directory of the app's state, where lookups are cached
+    state_path: Path
+    session: "HttpSession"
+    # look up the images again even if they were recently cached
+    refresh: bool = False
+    # the user's name on each platform, when given
+    usernames: Dict[str, str] = {}
+    # don't save the lookups to disk
+    dry_run: bool = False
+
+
+class Provider(NamedTuple):
+    """A launcher whose installed games are added to Steam."""
+
+    # tags the launcher's shortcuts, e.g. "gog"
+    platform: str
+    # lists the manifest files of installed games, in a stable order
+    list_manifests: Callable[[], Iterable[Path]]
+    # parses a manifest file into a game, `None` if it's not one
+    parse_manifest: Callable[[Path], Optional["Game"]]
+    # gets the source grid image URL of games, by game ID, leaving out
+    # those it has none for
+    get_artwork_urls: Callable[[List[str], ArtworkOptions], Dict[str, str]]
+    # seconds to wait for the launcher's games or grid images
+    timeout: float = DEFAULT_PROVIDER_TIMEOUT
+
+
+_providers: Dict[str, Provider] = {}
+_builtins_loaded = False
+
+
+def _load_builtin_providers():
+    global _builtins_loaded
+    if not _builtins_loaded:
+        _builtins_loaded = True
+        for module in BUILTIN_PROVIDERS:
+            provider = import_module(module).PROVIDER
+            _providers.setdefault(provider.platform, provider)
+
+
+def register_provider(provider: Provider):
+    """Add the provider of a launcher.
+
+    Replaces the provider of the same platform, if any. Providers are
+    used in the order they are registered, after the built-in ones.
+    """
+
+    _load_builtin_providers()
+    _providers[provider.platform] = provider
+
+
+def get_providers() -> List[Provider]:
+    """Get the providers of all launchers."""
+
+    _load_builtin_providers()
+    return list(_providers.values())
+
+
+def get_provider(platform: str) -> Optional[Provider]:
+    """Get the provider of a platform, `None` if there is none."""
+
+    _load_builtin_providers()
+    return _providers.get(platform)
+
+
+def get_platforms() -> FrozenSet[str]:
+    """Get the platforms of all launchers."""
+
+    return frozenset(provider.platform for provider in get_providers())
@@ -0,0 +1,268 @@
+from concurrent.futures import ThreadPoolExecutor
+from json import dumps as json_dump
+from json import loads as json_parse
+from pathlib import Path
+from threading import Lock
+from time import time
+from urllib.parse import quote, urlencode
+
+from esg.fileio import read_json
+from esg.game import Game
+from esg.platforms import Provider
+from esg.util import atomic_write, expand_path
+
+# EGL installed games manifests
+MANIFESTS_PATH = "%ProgramData%\\Epic\\EpicGamesLauncher\\Data\\Manifests"
+
+# Default time, in seconds, before a catalog entry is fetched again
+DEFAULT_CATALOG_MAX_AGE = 30 * 24 * 60 * 60
+
+
+def get_grid_image_url(key_images):
+    """Get the URL of the first wide (not "Tall") key image."""
+
+    for key_image in key_images:
+        if "Tall" not in key_image["type"]:
+            return key_image["url"]
+    return None
+
+
+class EpicSession:
+    """A Legendary session, created and logged in on first use.
+
+    The `LegendaryCore` and its login state are kept for the lifetime of
+    the session, so later logins reuse the access token as long as it's
+    valid and only refresh it once it is about to expire.
+    """
+
+    def __init__(self):
+        self._core = None
+        self._logged_in = None
+        self._lock = Lock()
+
+    @property
+    def started(self) -> bool:
+        """Whether a login was attempted in this session."""
+
+        return self._logged_in is not None
+
+    @property
+    def core(self):
+        """The `LegendaryCore` of the session, once `login` was called."""
+
+        return self._core
+
+    def login(self) -> bool:
+        """Log in with the credentials saved by Legendary.
+
+        Safe to call repeatedly, returns whether the session is logged
+        in. No request is sent while the current access token is valid.
+        """
+
+        with self._lock:
+            if self._core is None:
+                from legendary.core import LegendaryCore
+
+                self._core = LegendaryCore()
+            if self._logged_in is False:
+                return False
+            self._logged_in = self._login()
+            return self._logged_in
+
+    def _login(self) -> bool:
+        from legendary.models.exceptions import InvalidCredentialsError
+
+        try:
+            return self._core.login()
+        except ValueError:
+            # no saved credentials
+            return False
+        except InvalidCredentialsError:
+            self._core.lgd.invalidate_userdata()
+            return False
+
+
+_session = None
+_session_lock = Lock()
+
+
+def get_session() -> EpicSession:
+    """Get the default Epic session, shared across the app."""
+
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = EpicSession()
+        return _session
+
+
+class EpicCatalog:
+    """A local index of the Epic catalog items of the user's games.
+
+    Keeps the `keyImages` of each catalog item on disk, so only items
+    that were never seen before or whose entry is older than `max_age`
+    seconds are requested again. Those are all requested at once, each
+    on its own thread. The Epic session is only logged in when there is
+    something to request. With `dry_run`, the index is not saved.
+    """
+
+    FILE_NAME = "epic-catalog.json"
+
+    def __init__(
+        self,
+        cache_path,
+        session=None,
+        max_age: int = DEFAULT_CATALOG_MAX_AGE,
+        max_workers: int = 8,
+        dry_run: bool = False,
+    ):
+        self._session = session or get_session()
+        self._path = Path(cache_path) / self.FILE_NAME
+        self._max_age = max_age
+        self._max_workers = max_workers
+        self._dry_run = dry_run
+        self._namespaces = None
+        self._entries = self._load()
+
+    def _load(self) -> dict:
+        try:
+            entries = json_parse(self._path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        return entries
+
+    def _get_namespaces(self) -> dict:
+        """Get the namespace of each catalog item in the user's library."""
+
+        if self._namespaces is None:
+            self._namespaces = {}
+            if not self._session.login():
+                return self._namespaces
+            self._namespaces = {
+                item["catalogItemId"]: item["namespace"]
+                for item in self._session.core.egs.get_library_items()
+            }
+        return self._namespaces
+
+    def _is_fresh(self, catalog_id) -> bool:
+        entry = self._entries.get(catalog_id)
+        return bool(entry) and time() - entry["fetched"] < self._max_age
+
+    def _fetch_game_info(self, catalog_id, namespace):
+        return self._session.core.egs.get_game_info(
+            namespace=namespace, catalog_item_id=catalog_id
+        )
+
+    def get_key_images(self, catalog_ids) -> dict:
+        """Get the key images of catalog items, by catalog ID.
+
+        Items that are not in the user's library are left out.
+        """
+
+        missing_ids = [id for id in catalog_ids if not self._is_fresh(id)]
+        if missing_ids:
+            namespaces = self._get_namespaces()
+            missing_ids = [id for id in missing_ids if id in namespaces]
+
+        # refreshes the access token if it expired since the last call
+        if missing_ids and self._session.login():
+            with ThreadPoolExecutor(self._max_workers) as executor:
+                game_infos = executor.map(
+                    self._fetch_game_info,
+                    missing_ids,
+                    [namespaces[id] for id in missing_ids],
+                )
+                for catalog_id, game_info in zip(missing_ids, game_infos):
+                    if not game_info:
+                        continue
+                    self._entries[catalog_id] = {
+                        "keyImages": game_info.get("keyImages", []),
+                        "fetched": time(),
+                    }
+            if not self._dry_run:
+                self.save()
+
+        return {
+            id: self._entries[id]["keyImages"]
+            for id in catalog_ids
+            if id in self._entries
+        }
+
+    def save(self):
+        """Write the catalog index to disk."""
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(self._path, json_dump(self._entries).encode("utf-8"))
+
+
+# ----------------------------------------------------------------------
+# Provider
+# ----------------------------------------------------------------------
+def list_manifests():
+    """Get the manifests of installed Epic games, sorted by path."""
+
+    return sorted(expand_path(MANIFESTS_PATH).glob("*.item"))
+
+
+def parse_manifest(manifest_file):
+    """Parse an EGL `.item` manifest file into a game."""
+
+    manifest = read_json(manifest_file)
+
+    # Prepare launcher url
+    protocol = "com.epicgames.launcher://"
+    base_path = "apps"
+    namespace = manifest["CatalogNamespace"]
+    id = manifest["CatalogItemId"]
+    name = manifest["AppName"]
+    query = urlencode({"action": "launch", "silent": "true"})
+    path = quote(f"{base_path}/{namespace}:{id}:{name}")
+    launcher_url = f"{protocol}{path}?{query}"
+
+    # Prepare icon path
+    install_path = manifest["InstallLocation"]
+    icon_path = Path(install_path) / manifest["LaunchExecutable"]
+
+    return Game(
+        platform="epic",
+        id=manifest["CatalogItemId"],
+        name=manifest["DisplayName"],
+        exe_path=launcher_url,
+        args="",
+        icon_path=icon_path,
+    )
+
+
+def get_artwork_urls(game_ids, options):
+    """Get the wide key image URLs of games from the Epic catalog.
+
+    Only the games missing from the local catalog index are requested,
+    the Epic session is only logged in if there are some.
+    """
+
+    session = get_session()
+    catalog = EpicCatalog(
+        options.state_path,
+        session=session,
+        max_age=0 if options.refresh else DEFAULT_CATALOG_MAX_AGE,
+        dry_run=options.dry_run,
+    )
+    urls = {}
+    for id, key_images in catalog.get_key_images(game_ids).items():
+        url = get_grid_image_url(key_images)
+        if url:
+            urls[id] = url
+
+    if not urls and session.started and not session.login():
+        raise RuntimeError("Could not log in to Epic")
+    return urls
+
+
+PROVIDER = Provider(
+    platform="epic",
+    list_manifests=list_manifests,
+    parse_manifest=parse_manifest,
+    get_artwork_urls=get_artwork_urls,
+)
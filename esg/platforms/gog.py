@@ -2,6 +2,18 @@ from json import loads as json_parse
 from os.path import expandvars
 from pathlib import Path
 
+from esg.fileio import read_json
+from esg.game import Game
+from esg.grid import DEFAULT_STATS_MAX_AGE, get_cached_gog_stats
+from esg.platforms import Provider
+from esg.util import expand_path
+
+# GOG Galaxy launcher path
+GALAXY_PATH = "%ProgramFiles(x86)%\\GOG Galaxy\\GalaxyClient.exe"
+
+# GOG Galaxy config, has the game library path
+GALAXY_CONFIG_PATH = "%ProgramData%\\GOG.com\\Galaxy\\config.json"
+
 
 def get_username():
     """Get username."""
@@ -10,9 +22,95 @@ def get_username():
         "%LocalAppData%\\GOG.com\\Galaxy\\Configuration\\config.json"
     )
 
-    config_file = Path(expandvars(GALAXY_LOCAL_CONFIG_PATH))
+    config_file = expand_path(GALAXY_LOCAL_CONFIG_PATH)
     if not config_file.exists():
         return None
 
     config = json_parse(config_file.read_text())
     return config.get("username", None)
+
+
+def get_library_path():
+    """Get the directory GOG Galaxy installs games to, `None` if Galaxy
+    is not installed."""
+
+    try:
+        config = read_json(expand_path(GALAXY_CONFIG_PATH))
+    except FileNotFoundError:
+        return None
+    return Path(config["libraryPath"])
+
+
+# ----------------------------------------------------------------------
+# Provider
+# ----------------------------------------------------------------------
+def list_info_files():
+    """Get the info files of installed GOG games, sorted by path."""
+
+    library_path = get_library_path()
+    if library_path is None:
+        return []
+    return sorted(library_path.glob("*/goggame-*.info"))
+
+
+def parse_info_file(info_file):
+    """Parse a GOG `goggame-*.info` file into a game, `None` for DLCs."""
+
+    info = read_json(info_file)
+
+    # Ignore DLCs
+    if info["gameId"] != info["rootGameId"]:
+        return None
+
+    # Get the game's pwd & icon path
+    pwd = str(info_file.parent)
+    icon_path = ""
+    for task in info["playTasks"]:
+        if task.get("isPrimary", False):
+            # Use the actual game exe for the icon path
+            icon_path = info_file.parent / task["path"]
+
+            # if primary task has a pwd use it instead
+            if task.get("workingDir", False):
+                pwd = str(info_file.parent / task["workingDir"])
+                break
+
+    args = f'/command=runGame /gameId={info["gameId"]} /path="{pwd}"'
+
+    return Game(
+        platform="gog",
+        id=info["gameId"],
+        name=info["name"],
+        exe_path=expandvars(GALAXY_PATH),
+        args=args,
+        icon_path=icon_path,
+    )
+
+
+def get_artwork_urls(game_ids, options):
+    """Get the cover image URLs of games from the user's public GOG
+    profile stats."""
+
+    username = options.usernames.get("gog") or get_username()
+    if not username:
+        raise LookupError("Could not find GOG username")
+
+    games = get_cached_gog_stats(
+        username,
+        options.state_path,
+        max_age=0 if options.refresh else DEFAULT_STATS_MAX_AGE,
+        session=options.session,
+        dry_run=options.dry_run,
+    )
+    if games is None:
+        raise LookupError(f"No GOG profile found for {username}")
+
+    return {id: games[id]["image"] for id in game_ids if games.get(id)}
+
+
+PROVIDER = Provider(
+    platform="gog",
+    list_manifests=list_info_files,
+    parse_manifest=parse_info_file,
+    get_artwork_urls=get_artwork_urls,
+)
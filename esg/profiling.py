@@ -0,0 +1,153 @@
+import sys
+import threading
+from pathlib import Path
+from threading import Lock
+from typing import List, NamedTuple, Optional
+
+# Suffix of the files saved with cProfile, any other file is saved in the
+# speedscope format when pyinstrument is installed
+PSTATS_SUFFIX = ".prof"
+
+
+class Hotspot(NamedTuple):
+    """A function and the time spent in it, including its calls."""
+
+    name: str
+    # seconds
+    cumulative: float
+    # number of calls, `None` when the profiler samples
+    calls: Optional[int]
+
+
+def _get_pstats_name(func):
+    file_name, line, name = func
+    if file_name == "~":  # built-in
+        return name
+    return f"{name} ({Path(file_name).name}:{line})"
+
+
+class CallProfiler:
+    """A cProfile profiler of all of the app's threads.
+
+    Every call is recorded, so the number of calls of each function is
+    exact but the app runs slower. Saved as `.prof` pstats files, e.g.
+    for `snakeviz` or `python -m pstats`.
+    """
+
+    def __init__(self):
+        from cProfile import Profile
+
+        self._profile = Profile()
+        self._thread_profiles = []
+        self._lock = Lock()
+        self._stats = None
+
+    def _start_thread(self, *args):
+        from cProfile import Profile
+
+        sys.setprofile(None)
+        profile = Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ profiles all threads with a single profiler
+            return
+        with self._lock:
+            self._thread_profiles.append(profile)
+
+    def start(self):
+        threading.setprofile(self._start_thread)
+        self._profile.enable()
+
+    def stop(self):
+        from pstats import Stats
+
+        self._profile.disable()
+        threading.setprofile(None)
+        self._stats = Stats(self._profile)
+        with self._lock:
+            for profile in self._thread_profiles:
+                self._stats.add(profile)
+
+    def save(self, path):
+        self._stats.dump_stats(str(path))
+
+    def hotspots(self, limit: int = 20) -> List[Hotspot]:
+        """Get the functions with the most cumulative time."""
+
+        entries = sorted(
+            self._stats.stats.items(),
+            key=lambda item: item[1][3],
+            reverse=True,
+        )
+        return [
+            Hotspot(_get_pstats_name(func), cumulative, calls)
+            for func, (_, calls, _, cumulative, _) in entries[:limit]
+        ]
+
+
+class SamplingProfiler:
+    """A pyinstrument profiler of the app's main thread.
+
+    The call stack is sampled every `interval` seconds, so the app runs
+    at close to its normal speed. Time the main thread spends waiting on
+    worker threads, downloads and image renders shows up as waits.
+    Saved in the speedscope format, for https://www.speedscope.app.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        from pyinstrument import Profiler
+
+        self._profiler = Profiler(interval=interval, async_mode="disabled")
+
+    def start(self):
+        self._profiler.start()
+
+    def stop(self):
+        self._profiler.stop()
+
+    def save(self, path):
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        Path(path).write_text(
+            self._profiler.output(SpeedscopeRenderer()), encoding="utf-8"
+        )
+
+    def hotspots(self, limit: int = 20) -> List[Hotspot]:
+        """Get the functions with the most cumulative time."""
+
+        totals = {}
+
+        def add_frame(frame, stack):
+            location = f"{frame.file_path_short}:{frame.line_no}"
+            name = f"{frame.function} ({location})"
+            # count recursive calls once, skip self time and await frames
+            synthetic = getattr(frame, "is_synthetic", False)
+            if name not in stack and not synthetic:
+                totals[name] = totals.get(name, 0.0) + frame.time
+            for child in frame.children:
+                add_frame(child, stack | {name})
+
+        root_frame = self._profiler.last_session.root_frame()
+        if root_frame:
+            add_frame(root_frame, frozenset())
+
+        names = sorted(totals, key=totals.get, reverse=True)
+        return [Hotspot(name, totals[name], None) for name in names[:limit]]
+
+
+def get_profiler(path):
+    """Get a profiler for the file type of `path`.
+
+    Samples with pyinstrument when it's installed, unless a `.prof`
+    file is asked for. Returns the profiler and the path to save it to,
+    with a `.prof` suffix when falling back to cProfile.
+    """
+
+    path = Path(path)
+    if path.suffix != PSTATS_SUFFIX:
+        try:
+            return SamplingProfiler(), path
+        except ImportError:
+            path = path.with_suffix(PSTATS_SUFFIX)
+    return CallProfiler(), path
@@ -0,0 +1,103 @@
+from typing import List, NamedTuple
+
+from esg.platforms import get_platforms
+from esg.steam import create_shortcut
+
+
+class Reconciliation(NamedTuple):
+    """The result of reconciling existing shortcuts with installed games."""
+
+    shortcuts: dict
+    added: List[dict]
+    unchanged: List[dict]
+    removed: List[dict]
+    custom: List[dict]
+
+
+def _is_managed(shortcut, platforms) -> bool:
+    tags = shortcut.get("tags") or {}
+    return tags.get("0") in platforms
+
+
+def index_shortcuts(shortcuts) -> dict:
+    """Index shortcuts by their `DevkitGameID`.
+
+    If more than one shortcut has the same game ID, the one with the
+    most recent `LastPlayTime` wins.
+    """
+
+    index = {}
+    for shortcut in shortcuts:
+        game_id = shortcut.get("DevkitGameID")
+        if not game_id:
+            continue
+        indexed = index.get(game_id)
+        if indexed is None or shortcut.get("LastPlayTime", 0) > indexed.get(
+            "LastPlayTime", 0
+        ):
+            index[game_id] = shortcut
+    return index
+
+
+def reconcile_shortcuts(
+    existing_shortcuts, games, platforms=None
+) -> Reconciliation:
+    """Reconcile existing Steam shortcuts with the installed games.
+
+    Builds a new shortcut for every installed game, restoring the last
+    play time of its existing shortcut if any, followed by the custom
+    (user-created) shortcuts as-is. Shortcuts of managed platforms whose
+    game is no longer installed are dropped.
+
+    Shortcuts are managed by the app when tagged with the platform of a
+    launcher, all of them by default. Pass the `platforms` whose games
+    were discovered to keep the shortcuts of a launcher that failed.
+
+    Runs in linear time over both the shortcuts and the games.
+    """
+
+    if platforms is None:
+        platforms = get_platforms()
+    existing_shortcuts = list(existing_shortcuts)
+    existing_index = index_shortcuts(existing_shortcuts)
+
+    new_shortcuts = {}
+    added, unchanged = [], []
+    installed_ids = set()
+
+    for game in games:
+        installed_ids.add(game.id)
+
+        existing_shortcut = existing_index.get(game.id)
+        last_play_time = 0
+        if existing_shortcut is not None:
+            last_play_time = existing_shortcut.get("LastPlayTime", 0)
+
+        shortcut = create_shortcut(
+            game.name,
+            game.exe_path,
+            icon=game.icon_path,
+            launch_options=game.args,
+            devkit_game_id=game.id,
+            last_play_time=last_play_time,
+            tags=[game.platform],
+        )
+        new_shortcuts[str(len(new_shortcuts))] = shortcut
+
+        if existing_shortcut is None:
+            added.append(shortcut)
+        else:
+            unchanged.append(shortcut)
+
+    # Keep custom shortcuts as-is at the end of the list
+    removed, custom = [], []
+    for shortcut in existing_shortcuts:
+        if shortcut.get("DevkitGameID") in installed_ids:
+            continue
+        if _is_managed(shortcut, platforms):
+            removed.append(shortcut)
+            continue
+        new_shortcuts[str(len(new_shortcuts))] = shortcut
+        custom.append(shortcut)
+
+    return Reconciliation(new_shortcuts, added, unchanged, removed, custom)
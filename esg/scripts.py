@@ -1,49 +1,132 @@
 # ----------------------------------------------------------------------
 # Imports
 # ----------------------------------------------------------------------
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import chain
 from os import mkdir, system
 from pathlib import Path
 from platform import system
-from urllib.request import urlretrieve
+from time import perf_counter
 
+from click import FloatRange, IntRange
+from click import Path as PathType
 from click import echo, group, option, pass_context, style
-from legendary.core import LegendaryCore
-from legendary.models.exceptions import InvalidCredentialsError
 
-from esg.grid import get_gog_stats
-from esg.main import get_installed_games
-from esg.platforms import gog
+from esg.cache import ArtworkCache
+from esg.game import unique_games
+from esg.grid import GridJob, GridStore, process_grid_jobs
+from esg.http import HttpSession
+from esg.main import get_artwork_urls, get_installed_games
+from esg.metrics import get_metrics, span
+from esg.platforms import ArtworkOptions, get_platforms, get_providers
+from esg.profiling import get_profiler
+from esg.reconcile import reconcile_shortcuts
+from esg.state import ManifestState, get_state_path
 from esg.steam import (
-    create_shortcut,
-    generate_old_steam_id,
-    generate_steam_id,
+    get_grid_file_names,
     get_grids_path,
     get_user_ids,
     get_userdata_path,
-    image_to_grid,
     load_shortcuts,
     save_shortcuts,
 )
+from esg.steam.ids import get_all_shortcut_ids
+from esg.steam.process import find_steam_process, wait_for_exit
 from esg.util import (
     echo_debug,
     echo_error,
     echo_info,
     truncate_default_shortcut_fields,
-    unquote_string,
 )
+from esg.watch import (
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_SETTLE_TIME,
+    PollingWatcher,
+    ShortcutsFile,
+    diff_games,
+)
+
+# Grid variants rendered from the launchers' cover art. Logos need
+# transparent logo art which the launchers don't provide.
+GRID_SOURCE_VARIANTS = ("grid", "portrait", "hero")
+
+# Number of functions printed with `--profile-out`
+PROFILE_HOTSPOTS = 20
 
 
 # ----------------------------------------------------------------------
 # CLI
 # ----------------------------------------------------------------------
 @group()
-@option("-v", is_flag=True, help="Enable verbose output.")
+@option("-v", "verbose", is_flag=True, help="Enable verbose output.")
 @option("--dry-run", is_flag=True, help="Don't save changes to disk.")
+@option(
+    "--user",
+    "-u",
+    "user_ids",
+    multiple=True,
+    help="ID of a Steam user to manage, can be repeated.",
+)
+@option("--all-users", is_flag=True, help="Manage all of the Steam users.")
+@option(
+    "--profile",
+    "print_profile",
+    is_flag=True,
+    help="Print how long each stage took.",
+)
+@option(
+    "--metrics-json",
+    type=PathType(dir_okay=False, path_type=Path),
+    help="Save the stage timings and counters to a JSON file.",
+)
+@option(
+    "--trace-out",
+    type=PathType(dir_okay=False, path_type=Path),
+    help="Save a Chrome trace event file of the stages.",
+)
+@option(
+    "--profile-out",
+    type=PathType(dir_okay=False, path_type=Path),
+    help=(
+        "Profile the command and save it to a speedscope file, or to a "
+        "cProfile .prof file if the name ends with .prof or pyinstrument "
+        "is not installed."
+    ),
+)
 @pass_context
-def cli(ctx, verbose, dry_run):
+def cli(
+    ctx,
+    verbose,
+    dry_run,
+    user_ids,
+    all_users,
+    print_profile,
+    metrics_json,
+    trace_out,
+    profile_out,
+):
     """
     Epic Steam Galaxy: Non-Steam game shortcut manager"""
 
+    if profile_out:
+        profiler, profile_out = get_profiler(profile_out)
+        profiler.start()
+        ctx.call_on_close(partial(_report_profile, profiler, profile_out))
+
+    if print_profile or metrics_json or trace_out:
+        get_metrics().enable()
+        ctx.call_on_close(
+            partial(
+                _report_metrics,
+                ctx,
+                perf_counter(),
+                print_profile,
+                metrics_json,
+                trace_out,
+            )
+        )
+
     # Get steam's profiles path
     userdata_path = get_userdata_path()
     if not userdata_path:
@@ -53,282 +136,531 @@ def cli(ctx, verbose, dry_run):
     # Get the list of users on the system
     ids = get_user_ids(userdata_path)
 
-    # if more than one user, error out for now
-    if len(ids) > 1:
-        echo_error("Multiple Steam users are not supported yet")
+    # select the users to manage
+    if user_ids:
+        unknown_ids = [id for id in user_ids if id not in ids]
+        if unknown_ids:
+            echo_error(f"Unknown Steam user(s): {', '.join(unknown_ids)}")
+            exit(1)
+        ids = list(dict.fromkeys(user_ids))
+    elif len(ids) > 1 and not all_users:
+        echo_error(
+            "Multiple Steam users found, "
+            "select them with --user or use --all-users"
+        )
         exit(1)
 
-    # TODO: log steam user id selected
+    if not ids:
+        echo_error("Could not find any Steam user")
+        exit(1)
 
     ctx.obj = {}
     ctx.obj["dry_run"] = dry_run
-    ctx.obj["steam_id"] = ids[0]
+    ctx.obj["steam_ids"] = ids
 
 
 @cli.command()
+@option(
+    "--incremental",
+    is_flag=True,
+    help="Only parse launcher manifests that changed since the last run.",
+)
 @pass_context
-def sync_shortcuts(ctx):
+def sync_shortcuts(ctx, incremental):
     """Sync Steam shortcuts with installed games."""
 
-    # get the steam ID from current context
-    steam_id = ctx.obj["steam_id"]
+    # get the steam IDs from current context
+    steam_ids = ctx.obj["steam_ids"]
+    dry_run = ctx.obj["dry_run"]
     echo_info(
-        f"Syncing shortcuts for Steam user: {style(steam_id, fg='green')}"
+        f"Syncing shortcuts for {len(steam_ids)} Steam user(s): "
+        f"{style(', '.join(steam_ids), fg='green')}"
     )
 
     echo()
 
-    # load existing shortcuts
-    existing_shortcuts = load_shortcuts(steam_id)
-    existing_shortcuts = existing_shortcuts["shortcuts"]
-    echo_info(f"Loaded {len(existing_shortcuts)} existing shortcut(s)")
-    for i, shortcut in existing_shortcuts.items():
-        echo_debug(f"{i}: {truncate_default_shortcut_fields(shortcut)}")
+    # Get installed games, once for all users
+    manifest_state = ManifestState() if incremental else None
+    failed_platforms = set()
 
-    echo()
+    def on_discovery_error(provider, error):
+        failed_platforms.add(provider.platform)
+        echo_error(
+            f"Could not get installed {provider.platform} games: {error}"
+        )
 
-    # Get installed games
-    games = get_installed_games()
+    games = []
+    installed_games = get_installed_games(
+        manifest_state, on_error=on_discovery_error
+    )
+    for game in unique_games(installed_games):
+        echo_info(f" - {style(game.platform, fg='yellow')} {game.name}")
+        games.append(game)
     echo_info(f"Found {len(games)} installed game(s)")
 
-    # prepare new shortcuts dictionary
-    new_shortcuts = {}
+    # keep the shortcuts of launchers whose games could not be listed
+    platforms = get_platforms() - failed_platforms
 
-    # Build new shortcuts dictionary
-    for i, game in enumerate(games):
-        echo_info(f" - {style(game.platform, fg='yellow')} {game.name}")
+    # Sync the users in parallel, then report on each of them in order
+    failed_count = 0
+    sync_user = partial(
+        _sync_user_shortcuts, games=games, platforms=platforms, dry_run=dry_run
+    )
+    with ThreadPoolExecutor() as executor:
+        user_results = executor.map(_catch_errors(sync_user), steam_ids)
+        for steam_id, (user_result, error) in zip(steam_ids, user_results):
+            echo()
+            echo_info(f"Steam user: {style(steam_id, fg='green')}")
+            if error:
+                failed_count += 1
+                echo_error(f"Could not sync shortcuts: {error}")
+                continue
+            _echo_sync_result(*user_result, dry_run=dry_run)
+
+    if not dry_run and manifest_state:
+        manifest_state.save()
+
+    if failed_count:
+        echo_error(f"Failed to sync {failed_count} Steam user(s)")
+        exit(1)
+
+
+def _sync_user_shortcuts(steam_id, games, platforms, dry_run):
+    """Reconcile and save the shortcuts of a Steam user."""
 
-        # get last play time from existing shortcuts if available
-        last_play_time = 0
-        for shortcut in existing_shortcuts.values():
-            if shortcut["DevkitGameID"] == game.id:
-                saved_last_play_time = shortcut.get("LastPlayTime", 0)
-                if saved_last_play_time > 0:
-                    last_play_time = saved_last_play_time
-                    echo_debug(
-                        f"Last play time restored for {style(game.name, fg='green')}"
-                    )
-                    break
-
-        # create shortcut
-        game_shortcut = create_shortcut(
-            game.name,
-            game.exe_path,
-            icon=game.icon_path,
-            launch_options=game.args,
-            devkit_game_id=game.id,
-            last_play_time=last_play_time,
-            tags=[game.platform],
+    existing_shortcuts = load_shortcuts(steam_id)["shortcuts"]
+    with span("shortcuts.reconcile", user=steam_id):
+        result = reconcile_shortcuts(
+            existing_shortcuts.values(), games, platforms
         )
-        echo_debug(f"{truncate_default_shortcut_fields(game_shortcut)}")
+    saved = False
+    if not dry_run:
+        saved = save_shortcuts(steam_id, {"shortcuts": result.shortcuts})
+    return existing_shortcuts, result, saved
 
-        # add to new shortcuts dictionary
-        new_shortcuts[str(i)] = game_shortcut
 
-    echo()
+def _echo_sync_result(existing_shortcuts, result, saved, dry_run):
+    echo_info(f"Loaded {len(existing_shortcuts)} existing shortcut(s)")
+    for i, shortcut in existing_shortcuts.items():
+        echo_debug(f"{i}: {truncate_default_shortcut_fields(shortcut)}")
 
-    # handle custom (user-created) shortcuts
-    # Keep them as-is at the end of the list
-    custom_shortcuts_count = 0
-    for shortcut in existing_shortcuts.values():
-        if shortcut["DevkitGameID"] not in [game.id for game in games]:
-            new_shortcuts[str(len(new_shortcuts))] = shortcut
-            custom_shortcuts_count += 1
+    for shortcut in result.added:
+        echo_debug(f"Added: {truncate_default_shortcut_fields(shortcut)}")
+    for shortcut in result.unchanged:
+        if shortcut["LastPlayTime"] > 0:
             echo_debug(
-                f"Custom shortcut for {style(shortcut['AppName'], fg='green')} added"
+                f"Last play time restored for {style(shortcut['AppName'], fg='green')}"
             )
-    echo_info(f"{custom_shortcuts_count} custom shortcut(s) found and restored")
+    for shortcut in result.removed:
+        echo_debug(
+            f"Shortcut for uninstalled {style(shortcut['AppName'], fg='yellow')} removed"
+        )
+    for shortcut in result.custom:
+        echo_debug(
+            f"Custom shortcut for {style(shortcut['AppName'], fg='green')} added"
+        )
+    echo_info(
+        f"{len(result.added)} shortcut(s) added, "
+        f"{len(result.unchanged)} updated, {len(result.removed)} removed"
+    )
+    echo_info(f"{len(result.custom)} custom shortcut(s) found and restored")
 
-    # save new shortcuts
-    if not ctx.obj["dry_run"]:
-        save_shortcuts(steam_id, {"shortcuts": new_shortcuts})
+    if dry_run:
+        echo_info(f"{style('Dry run', fg='red')}: new shortcuts not saved")
+    elif saved:
         echo_info("Saved new shortcuts")
     else:
-        echo_info(f"{style('Dry run', fg='red')}: new shortcuts not saved")
+        echo_info("Shortcuts are up to date, nothing to save")
 
 
 @cli.command()
-@option("--gog-username", required=False, help="Your GOG username.")
+@option(
+    "--interval",
+    type=FloatRange(min=0.1),
+    default=DEFAULT_POLL_INTERVAL,
+    show_default=True,
+    help="Seconds between two checks of the launchers' manifests.",
+)
+@option(
+    "--settle",
+    type=FloatRange(min=0),
+    default=DEFAULT_SETTLE_TIME,
+    show_default=True,
+    help="Seconds without changes to wait for before syncing.",
+)
 @pass_context
-def download_grids(ctx, gog_username):
-    """Download Steam grid images for current shortcuts."""
+def watch(ctx, interval, settle):
+    """Sync Steam shortcuts whenever installed games change."""
 
-    # try to get username from Galaxy config
-    if not gog_username:
-        gog_username = gog.get_username()
-        if not gog_username:
-            echo_error("Could not find GOG username")
-            exit(1)
+    steam_ids = ctx.obj["steam_ids"]
+    dry_run = ctx.obj["dry_run"]
+    echo_info(
+        f"Watching installed games for {len(steam_ids)} Steam user(s): "
+        f"{style(', '.join(steam_ids), fg='green')}"
+    )
 
-    # load shortcuts
-    steam_id = ctx.obj["steam_id"]
-    shortcuts = load_shortcuts(steam_id)
+    # games and shortcuts are kept in memory between syncs, only the
+    # changed manifests and shortcut files are read again
+    providers = get_providers()
+    manifest_state = ManifestState()
+    users = [ShortcutsFile(steam_id) for steam_id in steam_ids]
 
-    # find the platform tags used in the shortcuts
-    platforms = set()
-    for shortcut in shortcuts["shortcuts"].values():
-        first_tag = shortcut["tags"].get("0", None)
-        if first_tag:
-            platforms.add(first_tag)
-    echo_info(f"Found {len(platforms)} platform(s): {', '.join(platforms)}")
+    def on_watch_error(provider, error):
+        echo_error(f"Could not watch {provider.platform} games: {error}")
 
-    echo()
+    watcher = PollingWatcher(providers, interval, settle, on_watch_error)
 
-    grids_path = get_grids_path(steam_id)
-    cache_path = str(Path(grids_path) / "esg-cache")
+    games = []
+    try:
+        while True:
+            if not dry_run:
+                _wait_for_steam_exit()
 
-    # make sure these directories exist
-    if not ctx.obj["dry_run"]:
-        try:
-            mkdir(grids_path)
-            echo_debug(f"Created {grids_path}")
-        except FileExistsError:
-            echo_debug(
-                f"grids dir: {style(grids_path, fg='yellow')} already exists"
+            games, changes, platforms = _get_game_changes(
+                manifest_state, providers, games
             )
+            if any(changes):
+                echo()
+                for label, changed_games in zip(
+                    ("Installed", "Updated", "Uninstalled"), changes
+                ):
+                    for game in changed_games:
+                        echo_info(
+                            f"{label}: {style(game.platform, fg='yellow')} "
+                            f"{game.name}"
+                        )
+                _sync_watched_shortcuts(users, games, platforms, dry_run)
+                if not dry_run:
+                    manifest_state.save()
+            else:
+                echo_debug("No installed game changed")
+
+            changed_paths = watcher.wait_for_changes()
+            if changed_paths is None:
+                break
+            for path in changed_paths:
+                echo_debug(f"Changed manifest: {path}")
+    except KeyboardInterrupt:
+        watcher.stop()
+        echo()
+        echo_info("Stopped watching")
+
+
+def _wait_for_steam_exit():
+    """Wait for Steam to exit, it overwrites the shortcuts on exit."""
+
+    steam_process = find_steam_process()
+    if not steam_process:
+        return
+
+    def report_progress(elapsed):
+        echo_debug(f"Waiting for Steam to exit ({elapsed:.0f}s)")
+
+    echo_info("Steam is running, waiting for it to exit to sync shortcuts")
+    wait_for_exit(steam_process, callback=report_progress, interval=5)
+
+
+def _get_game_changes(manifest_state, providers, last_games):
+    """Get the installed games and what changed since `last_games`.
+
+    The games of launchers that fail to list them are assumed unchanged,
+    and their shortcuts are left alone.
+    """
+
+    failed_platforms = set()
+
+    def on_discovery_error(provider, error):
+        failed_platforms.add(provider.platform)
+        echo_error(
+            f"Could not get installed {provider.platform} games: {error}"
+        )
+
+    installed_games = get_installed_games(
+        manifest_state, providers=providers, on_error=on_discovery_error
+    )
+    games = list(unique_games(installed_games))
+    games.extend(
+        game for game in last_games if game.platform in failed_platforms
+    )
+
+    platforms = get_platforms() - failed_platforms
+    return games, diff_games(last_games, games), platforms
+
+
+def _sync_watched_shortcuts(users, games, platforms, dry_run):
+    """Reconcile and save the in-memory shortcuts of the watched users."""
+
+    for user in users:
+        echo()
+        echo_info(f"Steam user: {style(user.steam_id, fg='green')}")
         try:
-            mkdir(cache_path)
-            echo_debug(f"Created {cache_path}")
-        except FileExistsError:
-            echo_debug(
-                f"cache dir: {style(cache_path, fg='yellow')} already exists"
+            existing_shortcuts = user.load()
+            with span("shortcuts.reconcile", user=user.steam_id):
+                result = reconcile_shortcuts(
+                    existing_shortcuts.values(), games, platforms
+                )
+            saved = False
+            if not dry_run:
+                saved = user.save(result.shortcuts)
+        except (OSError, ValueError) as error:
+            echo_error(f"Could not sync shortcuts: {error}")
+            continue
+        _echo_sync_result(existing_shortcuts, result, saved, dry_run)
+
+
+def _report_metrics(ctx, start, print_profile, metrics_json, trace_out):
+    """Report the metrics of a command once it's done."""
+
+    metrics = get_metrics()
+    metrics.record(
+        f"command.{ctx.invoked_subcommand}", start, perf_counter() - start
+    )
+
+    if print_profile:
+        echo()
+        echo_info("Stage timings:")
+        stages = sorted(
+            metrics.summary().items(),
+            key=lambda item: item[1]["total"],
+            reverse=True,
+        )
+        for name, stage in stages:
+            echo_info(
+                f" - {name}: {stage['count']}x, "
+                f"{stage['total'] * 1000:.1f}ms total, "
+                f"{stage['mean'] * 1000:.1f}ms mean, "
+                f"{stage['max'] * 1000:.1f}ms max"
             )
+        counters = metrics.counters()
+        if counters:
+            echo_info("Counters:")
+        for name, value in sorted(counters.items()):
+            echo_info(f" - {name}: {value}")
+
+    if metrics_json:
+        metrics_json.write_text(metrics.to_json())
+        echo_debug(f"Metrics saved to {metrics_json}")
+    if trace_out:
+        trace_out.write_text(metrics.to_trace())
+        echo_debug(f"Trace saved to {trace_out}")
+
+
+def _report_profile(profiler, path):
+    """Save the profile of a command and print its hotspots."""
+
+    profiler.stop()
+    profiler.save(path)
 
     echo()
+    echo_info("Hotspots, by cumulative time:")
+    for hotspot in profiler.hotspots(PROFILE_HOTSPOTS):
+        calls = ""
+        if hotspot.calls is not None:
+            calls = f", {hotspot.calls} call(s)"
+        echo_info(
+            f" - {hotspot.name}: {hotspot.cumulative * 1000:.1f}ms{calls}"
+        )
+    echo_info(f"Profile saved to {style(str(path), fg='green')}")
 
-    # download grids for each platform
-    # TODO: refactor the reusable code across platforms
-    if "gog" in platforms:
-        echo_info(f"Getting grids for {style('gog', fg='green')}")
 
-        # get gog stats
-        echo_info(f"Downloading stats for {style(gog_username, fg='green')}")
-        games = get_gog_stats(gog_username)
+def _catch_errors(func):
+    """Wrap a function to return `(result, error)` instead of raising."""
 
-        # get grids
-        echo_info(f"Downloading grids for {style('gog', fg='green')}")
-        for shortcut in shortcuts["shortcuts"].values():
-            if shortcut["tags"].get("0", "") != "gog":
-                continue
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs), None
+        except (OSError, ValueError) as error:
+            return None, error
 
-            game_id = shortcut["DevkitGameID"]
-            old_steam_id = generate_old_steam_id(
-                unquote_string(shortcut["Exe"]), shortcut["AppName"]
-            )
-            steam_id = generate_steam_id(
-                unquote_string(shortcut["Exe"]), shortcut["AppName"]
-            )
+    return wrapper
+
+
+@cli.command()
+@option("--gog-username", required=False, help="Your GOG username.")
+@option(
+    "--jobs",
+    "-j",
+    type=IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Number of concurrent image downloads.",
+)
+@option(
+    "--refresh-stats",
+    is_flag=True,
+    help="Look up the grid images again even if they were recently cached.",
+)
+@pass_context
+def download_grids(ctx, gog_username, jobs, refresh_stats):
+    """Download Steam grid images for current shortcuts."""
 
-            game = games.get(game_id, None)
-            if not game:
-                echo_error(f"No stats found for {shortcut['AppName']}")
+    # source and rendered images are shared by all users
+    cache_path = get_state_path() / "artwork"
+    store_path = get_state_path() / "grids"
+
+    # make sure these directories exist
+    if not ctx.obj["dry_run"]:
+        for path in (cache_path, store_path):
+            try:
+                path.mkdir(parents=True)
+                echo_debug(f"Created {path}")
+            except FileExistsError:
+                echo_debug(f"{style(path, fg='yellow')} already exists")
+
+    # find the shortcuts missing grid images, for every user
+    platforms = set()
+    managed_platforms = get_platforms()
+    missing_grids = {}
+    for steam_id in ctx.obj["steam_ids"]:
+        shortcuts = load_shortcuts(steam_id)
+        grids_path = get_grids_path(steam_id)
+
+        if not ctx.obj["dry_run"]:
+            try:
+                mkdir(grids_path)
+                echo_debug(f"Created {grids_path}")
+            except FileExistsError:
+                echo_debug(
+                    f"grids dir: {style(grids_path, fg='yellow')} "
+                    "already exists"
+                )
+
+        entries = list(shortcuts["shortcuts"].values())
+        for shortcut, ids in zip(entries, get_all_shortcut_ids(entries)):
+            # find the platform tags used in the shortcuts
+            first_tag = shortcut["tags"].get("0", None)
+            if not first_tag:
+                continue
+            platforms.add(first_tag)
+            if first_tag not in managed_platforms:
                 continue
 
-            echo_info(f" - {shortcut['AppName']}")
-
-            source_image_url = game["image"]
-            source_image_path = Path(cache_path) / f"{game_id}.jpg"
-            grid_paths = [
-                Path(grids_path) / f"{steam_id}.jpg",
-                Path(grids_path) / f"{old_steam_id}.jpg",
-            ]
-
-            for grid_path in grid_paths:
-                if grid_path.is_file():
-                    echo_debug(
-                        f"Grid image {style(grid_path, fg='yellow')} already exists"
-                    )
-                    continue
-
-                if source_image_path.is_file():
-                    echo_debug(
-                        f"Source image {style(source_image_path, fg='yellow')} already exists"
-                    )
-                    if not ctx.obj["dry_run"]:
-                        image_to_grid(source_image_path, str(grid_path))
-                    continue
-
-                if not ctx.obj["dry_run"]:
-                    urlretrieve(source_image_url, str(source_image_path))
-                    image_to_grid(source_image_path, str(grid_path))
-
-                # TODO: 2652489558_hero.png (steam client cover images (wide))
-
-                echo_debug(f"Source image url: {source_image_url}")
-                echo_debug(f"Source image path: {source_image_path}")
-                echo_debug(f"Grid image path: {grid_path}")
+            targets = _missing_grid_targets(grids_path, ids)
+            if targets:
+                missing_grids.setdefault(first_tag, []).append(
+                    (shortcut, targets)
+                )
 
-    echo()
+    echo_info(f"Found {len(platforms)} platform(s): {', '.join(platforms)}")
 
-    if "epic" in platforms:
-        echo_info(f"Getting grids for {style('epic', fg='green')}")
+    echo()
 
-        # Prepare the legendary core
-        legendary = LegendaryCore()
-        try:
-            if not legendary.login():
-                echo_error("Could not log in to Epic")
-        except ValueError:
-            pass
-        except InvalidCredentialsError:
-            legendary.lgd.invalidate_userdata()
-
-        # Grab the list of games in user's library
-        games = legendary.egs.get_library_items()
-
-        # get grids
-        echo_info(f"Downloading grids for {style('epic', fg='green')}")
-        for shortcut in shortcuts["shortcuts"].values():
-            if shortcut["tags"].get("0", "") != "epic":
+    # share connections between the stats and image downloads
+    session = HttpSession(pool_size=jobs)
+
+    # look up the source images of all platforms at once, merging the
+    # jobs of the same source image so it's only downloaded and rendered
+    # once
+    options = ArtworkOptions(
+        state_path=get_state_path(),
+        session=session,
+        refresh=refresh_stats,
+        usernames={"gog": gog_username} if gog_username else {},
+        dry_run=ctx.obj["dry_run"],
+    )
+    game_ids = {
+        platform: list({shortcut["DevkitGameID"] for shortcut, _ in grids})
+        for platform, grids in missing_grids.items()
+    }
+    grid_jobs = {}
+    for platform, urls, error in get_artwork_urls(game_ids, options):
+        echo_info(f"Getting grids for {style(platform, fg='green')}")
+        if error:
+            echo_error(f"Could not get grid images: {error}")
+            echo()
+            continue
+
+        for shortcut, targets in missing_grids[platform]:
+            source_image_url = urls.get(shortcut["DevkitGameID"])
+            if not source_image_url:
+                echo_error(f"No grid image found for {shortcut['AppName']}")
                 continue
 
-            game_id = shortcut["DevkitGameID"]
-            steam_id = generate_steam_id(
-                unquote_string(shortcut["Exe"]), shortcut["AppName"]
+            _add_grid_job(
+                grid_jobs, shortcut["AppName"], source_image_url, targets
             )
 
-            echo_info(f" - {shortcut['AppName']}")
-
-            source_image_path = Path(cache_path) / f"{game_id}.jpg"
-            grid_image_path = Path(grids_path) / f"{steam_id}.jpg"
-            grid_paths = [
-                Path(grids_path) / f"{steam_id}.jpg",
-                Path(grids_path) / f"{old_steam_id}.jpg",
-            ]
-
-            for grid_path in grid_paths:
-                if grid_path.is_file():
-                    echo_debug(
-                        f"Grid image {style(grid_path, fg='yellow')} already exists"
-                    )
-                    continue
-
-                if source_image_path.is_file():
-                    echo_debug(
-                        f"Source image {style(source_image_path, fg='yellow')} already exists"
-                    )
-                    if not ctx.obj["dry_run"]:
-                        image_to_grid(source_image_path, str(grid_path))
-                    continue
-
-                # Get the game image URLs
-                source_image_url = None
-                for game in games:
-                    if game["catalogItemId"] != game_id:
-                        continue
-                    game_info = legendary.egs.get_game_info(
-                        namespace=game["namespace"],
-                        catalog_item_id=game_id,
-                    )
-                    key_images = game_info["keyImages"]
-                    for key_image in key_images:
-                        if "Tall" not in key_image["type"]:
-                            source_image_url = key_image["url"]
-                            break
-
-                if not ctx.obj["dry_run"]:
-                    urlretrieve(source_image_url, str(source_image_path))
-                    image_to_grid(source_image_path, str(grid_path))
+        echo()
+
+    grid_jobs = list(grid_jobs.values())
+    if not grid_jobs:
+        echo_info("All grid images are up to date")
+
+    if ctx.obj["dry_run"]:
+        if grid_jobs:
+            for job in grid_jobs:
+                echo_info(f" - {job.name}")
+                echo_debug(f"Source image url: {job.url}")
+                for grid_path in chain(*job.targets.values()):
+                    echo_debug(f"Grid image path: {grid_path}")
+            echo_info(f"{style('Dry run', fg='red')}: grid images not saved")
+        return
+
+    cache = ArtworkCache(cache_path, session=session)
+    store = GridStore(store_path)
+    if grid_jobs:
+        echo_info(f"Downloading {len(grid_jobs)} grid image(s)")
+        failed_count = 0
+        grid_results = process_grid_jobs(grid_jobs, cache, store, jobs)
+        for i, (job, error) in enumerate(grid_results):
+            progress = f"[{i + 1}/{len(grid_jobs)}]"
+            if error:
+                failed_count += 1
+                echo_error(f"{progress} {job.name}: {error}")
+                continue
+            echo_info(f"{progress} {job.name}")
+            for grid_path in chain(*job.targets.values()):
+                echo_debug(f"Grid image path: {grid_path}")
+
+        if failed_count:
+            echo_error(f"{failed_count} grid image(s) failed")
+
+    # drop stale and least recently used source images
+    evicted = cache.evict()
+    cache.save()
+    echo_debug(f"Evicted {len(evicted)} file(s) from the artwork cache")
+
+    # drop rendered images no grid image is linked to anymore
+    pruned = store.prune()
+    echo_debug(f"Pruned {len(pruned)} file(s) from the grid store")
+
+    for host, stats in session.summary().items():
+        echo_debug(
+            f"{host}: {stats['requests']} request(s), "
+            f"{stats['total']:.2f}s total, {stats['slowest']:.2f}s slowest"
+        )
+
+
+def _add_grid_job(grid_jobs, name, url, targets):
+    """Add the targets of a grid image to the job of its source URL."""
+
+    job = grid_jobs.get(url)
+    if job is None:
+        grid_jobs[url] = GridJob(name=name, url=url, targets=targets)
+        return
+
+    for variant, paths in targets.items():
+        job.targets.setdefault(variant, []).extend(paths)
+
+
+def _missing_grid_targets(grids_path, ids):
+    """Get the grid image paths of a shortcut that don't exist yet, from
+    its IDs."""
+
+    file_names = get_grid_file_names(ids)
+
+    targets = {}
+    for variant in GRID_SOURCE_VARIANTS:
+        for file_name in file_names[variant]:
+            grid_path = Path(grids_path) / file_name
+            if grid_path.is_file():
+                echo_debug(
+                    f"Grid image {style(grid_path, fg='yellow')} already exists"
+                )
+                continue
+            targets.setdefault(variant, []).append(grid_path)
+
+    return targets
 
 
 # ----------------------------------------------------------------------
@@ -0,0 +1,113 @@
+from json import dumps as json_dump
+from json import loads as json_parse
+from pathlib import Path
+from threading import Lock
+
+from esg.game import Game
+from esg.metrics import count
+from esg.util import atomic_write, expand_path
+
+# The `Game` fields persisted in the manifests state file
+GAME_FIELDS = ("platform", "id", "name", "exe_path", "args", "icon_path")
+
+
+def get_state_path():
+    """Get the path to the directory where the app keeps its state."""
+
+    return expand_path("%LocalAppData%\\esg")
+
+
+class ManifestState:
+    """The parsed launcher manifests from previous runs.
+
+    Each manifest is remembered by its path, modification time and size
+    along with the `Game` parsed from it, so only new or changed
+    manifests need to be opened and parsed again.
+    """
+
+    FILE_NAME = "manifests.json"
+
+    def __init__(self, path=None):
+        self._path = Path(path or get_state_path()) / self.FILE_NAME
+        self._entries = self._load()
+        self._seen = set()
+        self._dirty = False
+        self._lock = Lock()
+
+    def _load(self) -> dict:
+        try:
+            entries = json_parse(self._path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        return entries
+
+    def parse(self, manifest_path, parser):
+        """Get the game of a manifest, parsing it only if it changed.
+
+        `parser` is called with `manifest_path` when the manifest is new
+        or was modified since the last run, and must return a `Game` or
+        `None` for manifests that don't describe a game. Safe to call
+        from multiple threads.
+        """
+
+        key = str(manifest_path)
+        stat = Path(manifest_path).stat()
+
+        with self._lock:
+            self._seen.add(key)
+            entry = self._entries.get(key)
+        if (
+            entry
+            and entry["mtime"] == stat.st_mtime_ns
+            and entry["size"] == stat.st_size
+        ):
+            count("manifest.state.hit")
+            return _game_from_json(entry["game"])
+
+        count("manifest.state.miss")
+        game = parser(manifest_path)
+        with self._lock:
+            self._entries[key] = {
+                "mtime": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "game": _game_to_json(game),
+            }
+            self._dirty = True
+        return game
+
+    def save(self):
+        """Write the state to disk, forgetting manifests not seen anymore.
+
+        Does nothing when no manifest changed since the state was loaded.
+        A state kept in memory forgets the manifests that are not seen
+        again until its next save.
+        """
+
+        stale_keys = self._entries.keys() - self._seen
+        for key in stale_keys:
+            del self._entries[key]
+        with self._lock:
+            self._seen = set()
+        if not self._dirty and not stale_keys:
+            return
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(self._path, json_dump(self._entries).encode("utf-8"))
+        self._dirty = False
+
+
+def _game_to_json(game):
+    if game is None:
+        return None
+    fields = {field: getattr(game, field) for field in GAME_FIELDS}
+    fields["icon_path"] = str(fields["icon_path"] or "")
+    return fields
+
+
+def _game_from_json(fields):
+    if fields is None:
+        return None
+    icon_path = fields["icon_path"]
+    return Game(**{**fields, "icon_path": Path(icon_path) if icon_path else ""})
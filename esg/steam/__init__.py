@@ -0,0 +1,268 @@
+from math import ceil
+from pathlib import Path
+from shutil import copyfile
+from typing import NamedTuple, Tuple
+
+from esg.fileio import open_buffer
+from esg.metrics import span
+from esg.steam.ids import ShortcutIds, get_shortcut_ids
+from esg.steam.shortcuts import dumps as vdf_dump
+from esg.steam.shortcuts import loads as vdf_load
+from esg.util import atomic_write, backup_file, expand_path, file_matches
+
+# Number of previous versions of shortcuts.vdf kept when saving it
+SHORTCUTS_BACKUP_COUNT = 3
+
+
+def get_userdata_path():
+    """Get the path to the steam userdata directory."""
+
+    path = expand_path("%ProgramFiles(x86)%\\Steam\\userdata")
+    if not path.exists():
+        return None
+
+    return str(path)
+
+
+def get_shortcuts_path(steamId):
+    """Get the path to a user's `shortcuts.vdf` file path"""
+
+    userdata_path = get_userdata_path()
+    if not userdata_path:
+        raise ValueError("Userdata path does not exist.")
+
+    return Path(userdata_path) / steamId / "config" / "shortcuts.vdf"
+
+
+def get_grids_path(steamId):
+    """Get the path to a user's grid images path"""
+
+    userdata_path = get_userdata_path()
+    if not userdata_path:
+        raise ValueError("Userdata path does not exist.")
+
+    return Path(userdata_path) / steamId / "config" / "grid"
+
+
+def get_user_ids(userdata_path):
+    """Get the Steam users (profiles) IDs on the system."""
+
+    if not userdata_path:
+        raise ValueError("Userdata path is required.")
+
+    userdata_path = Path(userdata_path)
+    if not userdata_path.exists():
+        raise ValueError("Userdata path does not exist.")
+    if not userdata_path.is_dir():
+        raise ValueError("Userdata path is not a directory.")
+
+    # filter to just the directories that contain a localconfig.vdf file
+    user_profiles = [
+        x
+        for x in userdata_path.iterdir()
+        if x.is_dir() and (x / "config" / "localconfig.vdf").exists()
+    ]
+
+    return [profile.name for profile in user_profiles]
+
+
+def create_shortcut(
+    app_name,
+    exe,
+    app_id="",
+    start_dir="",
+    icon="",
+    shortcut_path="",
+    launch_options="",
+    is_hidden=False,
+    allow_desktop_config=True,
+    allow_overlay=True,
+    open_vr=False,
+    devkit=False,
+    devkit_game_id="",
+    devkit_override_app_id=False,
+    last_play_time=0,
+    flatpak_app_id="",
+    tags=[],
+):
+    """Create a shortcut dictionary for Steam.
+
+    `app_id` defaults to the ID Steam derives from `exe` and `app_name`.
+    """
+
+    if not app_name:
+        raise ValueError("app_name is required.")
+    if not exe:
+        raise ValueError("An exe path is required.")
+    if not app_id:
+        app_id = get_shortcut_ids(exe, app_name).app_id
+
+    # The `Exe`, `StartDir` and other paths must be quoted.
+    return {
+        "appid": app_id,
+        "AppName": app_name,
+        "Exe": f'"{exe}"' if exe else "",
+        "StartDir": f'"{start_dir}"' if start_dir else "",
+        "icon": f'"{icon}"' if icon else "",
+        "ShortcutPath": f'"{shortcut_path}"' if shortcut_path else "",
+        "LaunchOptions": launch_options,
+        "IsHidden": int(is_hidden),
+        "AllowDesktopConfig": int(allow_desktop_config),
+        "AllowOverlay": int(allow_overlay),
+        "OpenVR": int(open_vr),
+        "Devkit": int(devkit),
+        "DevkitGameID": devkit_game_id,
+        "DevkitOverrideAppID": int(devkit_override_app_id),
+        "LastPlayTime": last_play_time,
+        "FlatpakAppID": flatpak_app_id,
+        "tags": {str(i): tags[i] for i in range(len(tags))}
+        if len(tags)
+        else {},
+    }
+
+
+def load_shortcuts(steamId: str) -> dict:
+    """Load shortcuts.vdf from disk."""
+
+    with span("shortcuts.load", user=steamId):
+        try:
+            with open_buffer(get_shortcuts_path(steamId)) as vdf_data:
+                shortcuts = vdf_load(vdf_data)
+        except FileNotFoundError:
+            shortcuts = {"shortcuts": {}}
+    return shortcuts
+
+
+def save_shortcuts(steamId, shortcuts, backups=SHORTCUTS_BACKUP_COUNT) -> bool:
+    """Save shortcuts.vdf to disk.
+
+    The shortcuts are encoded in memory first, and the file is left
+    untouched if its content would not change. Otherwise the previous
+    file is kept as a rotating backup (`shortcuts.vdf.1.bak`, ...) and
+    replaced atomically, so a crash never leaves a truncated file.
+    Returns whether the file was written.
+    """
+
+    shortcuts_path = get_shortcuts_path(steamId)
+    with span("shortcuts.save", user=steamId):
+        vdf_bytes = vdf_dump(shortcuts)
+
+        if file_matches(shortcuts_path, vdf_bytes):
+            return False
+
+        backup_file(shortcuts_path, backups)
+        atomic_write(shortcuts_path, vdf_bytes)
+    return True
+
+
+def generate_old_steam_id(exe, name):
+    """Generate an ID for a steam shortcut to use for naming grid images.
+    The format of the string used to generate the ID used by Steam is:
+    "{game_exe_path}"{game_name}
+
+    Notice that the game_exe_path is quoted.
+
+    https://github.com/Hafas/node-steam-shortcuts
+    """
+
+    return str(get_shortcut_ids(exe, name).legacy_id)
+
+
+def generate_steam_id(exe, name):
+    """Generate an ID for a steam shortcut to use for naming grid
+    images. Uses the new format for the new steam library. Does not
+    apply to big picture mode yet.
+    """
+
+    return str(get_shortcut_ids(exe, name).grid_id) + "p"
+
+
+def get_grid_file_names(ids: ShortcutIds):
+    """Get the file names of a shortcut's grid images, by variant, from
+    its IDs.
+
+    The new Steam library names the images after the shortcut's 32-bit
+    ID, with a suffix for each variant: none for the wide grid, `p` for
+    the portrait capsule, `_hero` and `_logo`. The wide grid is also
+    saved under the legacy 64-bit ID.
+    """
+
+    steam_id = ids.grid_id
+    return {
+        "grid": [f"{steam_id}.jpg", f"{ids.legacy_id}.jpg"],
+        "portrait": [f"{steam_id}p.jpg"],
+        "hero": [f"{steam_id}_hero.jpg"],
+        "logo": [f"{steam_id}_logo.png"],
+    }
+
+
+class GridVariant(NamedTuple):
+    """The size of a Steam grid image variant and how to fit it."""
+
+    size: Tuple[int, int]
+    # "cover" crops the image to fill the size, "contain" pads it with
+    # transparency to fit in it
+    fit: str
+
+
+GRID_VARIANTS = {
+    "grid": GridVariant((920, 430), "cover"),
+    "portrait": GridVariant((600, 900), "cover"),
+    "hero": GridVariant((1920, 620), "cover"),
+    "logo": GridVariant((640, 360), "contain"),
+}
+
+
+def _get_draft_size(image_size, sizes):
+    """Get the smallest size an image can be decoded at to be resized to
+    cover each of the given sizes without upscaling."""
+
+    width, height = image_size
+    draft_width, draft_height = 0, 0
+    for size in sizes:
+        ratio = max(size[0] / width, size[1] / height)
+        draft_width = max(draft_width, ceil(width * ratio))
+        draft_height = max(draft_height, ceil(height * ratio))
+    return draft_width, draft_height
+
+
+def render_grids(image_path, targets):
+    """Render grid image variants from a single source image.
+
+    `targets` maps `GRID_VARIANTS` names to the paths to save each
+    variant to. The source is decoded once, at a reduced size when the
+    format allows it, and each variant is encoded once then copied to
+    its other paths.
+    """
+
+    # only needed by grid downloads, keep them out of the CLI's startup
+    from PIL import Image
+    from resizeimage import resizeimage
+
+    with Image.open(image_path) as image:
+        variants = [GRID_VARIANTS[variant] for variant in targets]
+        image.draft(
+            "RGB", _get_draft_size(image.size, [v.size for v in variants])
+        )
+        image.load()
+
+        for variant, paths in targets.items():
+            if not paths:
+                continue
+
+            size, fit = GRID_VARIANTS[variant]
+            if fit == "cover":
+                grid = resizeimage.resize_cover(image, size, validate=False)
+            else:
+                grid = resizeimage.resize_contain(image, size)
+
+            first_path, *other_paths = paths
+            if Path(first_path).suffix.lower() in (".jpg", ".jpeg"):
+                grid = grid.convert("RGB")
+            grid.save(first_path)
+            for path in other_paths:
+                copyfile(first_path, path)
+
+
+def image_to_grid(image_path, output_image_path):
+    render_grids(image_path, {"grid": [output_image_path]})
@@ -0,0 +1,46 @@
+from binascii import crc32
+from functools import lru_cache
+from typing import List, NamedTuple
+
+
+class ShortcutIds(NamedTuple):
+    """The IDs Steam derives from a shortcut's executable and name."""
+
+    # unsigned 32-bit ID, names the grid images of the new library
+    grid_id: int
+    # 64-bit ID of the legacy library, also used for grid images
+    legacy_id: int
+    # the 32-bit ID as the signed integer stored in the `appid` field
+    app_id: int
+
+
+@lru_cache(maxsize=4096)
+def get_shortcut_ids(exe, name) -> ShortcutIds:
+    """Get all of the IDs of a shortcut, from a single CRC.
+
+    The IDs are the CRC-32 of `"{exe}"{name}`, with the exe path quoted,
+    with the top bit set. Results are memoized, as the same shortcuts
+    are looked up for each grid image variant and Steam user.
+
+    https://github.com/Hafas/node-steam-shortcuts
+    """
+
+    grid_id = crc32(f'"{exe}"{name}'.encode()) | 0x80000000
+    return ShortcutIds(
+        grid_id=grid_id,
+        legacy_id=(grid_id << 32) | 0x02000000,
+        app_id=grid_id - 0x100000000,
+    )
+
+
+def get_all_shortcut_ids(shortcuts) -> List[ShortcutIds]:
+    """Get the IDs of shortcut entries, in order.
+
+    `shortcuts` are entries as stored in `shortcuts.vdf`, with a quoted
+    `Exe` path.
+    """
+
+    return [
+        get_shortcut_ids(shortcut["Exe"][1:-1], shortcut["AppName"])
+        for shortcut in shortcuts
+    ]
@@ -0,0 +1,117 @@
+import re
+from typing import Optional, Sequence
+
+# Tokens of a VDF buffer, whitespace is skipped by searching for them
+_BUFFER_TOKEN_RE = re.compile(
+    rb"""
+      //[^\n]*
+    | "((?:[^"\\]|\\.)*)"
+    | ([{}])
+    | \[[^\]\n]*\]
+    | ([^\s{}"]+)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# The braces, strings and comments of a VDF buffer, searched for to
+# skip over a block. Strings and comments are matched whole so that the
+# braces in them are skipped, and match up to the end of a truncated
+# buffer.
+_BUFFER_SKIP_RE = re.compile(
+    rb"""
+      //[^\n]*
+    | "(?:[^"\\]|\\.)*"?
+    | ([{}])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_ESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+_ESCAPES = {
+    "n": "\n",
+    "t": "\t",
+    "v": "\v",
+    "b": "\b",
+    "r": "\r",
+    "f": "\f",
+    "a": "\a",
+}
+
+
+def _unescape(value: str) -> str:
+    return _ESCAPE_RE.sub(
+        lambda match: _ESCAPES.get(match.group(1), match.group(1)), value
+    )
+
+
+def _skip_buffer_block(buffer, pos: int) -> int:
+    """Get the position after the end of the block whose content starts
+    at `pos`."""
+
+    depth = 1
+    search = _BUFFER_SKIP_RE.search
+    while depth:
+        match = search(buffer, pos)
+        if match is None:
+            return len(buffer)
+        pos = match.end()
+        brace = match.group(1)
+        if brace:
+            depth += 1 if brace == b"{" else -1
+    return pos
+
+
+def find_buffer_value(buffer, key_path: Sequence[str]) -> Optional[str]:
+    """Find a value in the content of a text VDF file.
+
+    `buffer` is the content of a UTF-8 file, such as `bytes` or an
+    `mmap`, searched in place. `key_path` is the sequence of keys leading
+    to the value, e.g. `("UserLocalConfigStore", "friends",
+    "PersonaName")`. Blocks that don't lead to the value are skipped over
+    without being tokenized, and the search stops as soon as the value
+    is found.
+
+    Returns `None` if the key path does not exist or does not lead to a
+    plain value.
+    """
+
+    parent_path = [key.encode("utf-8") for key in key_path[:-1]]
+    value_key = key_path[-1].encode("utf-8")
+
+    blocks = []  # keys of the enclosing blocks
+    key = None
+    pos = 0
+    search = _BUFFER_TOKEN_RE.search
+    while True:
+        match = search(buffer, pos)
+        if match is None:
+            return None
+        pos = match.end()
+
+        quoted, brace, token = match.groups()
+        if brace == b"{":
+            blocks.append(key)
+            key = None
+            if blocks != parent_path[: len(blocks)]:
+                pos = _skip_buffer_block(buffer, pos)
+                blocks.pop()
+            continue
+        if brace:
+            if blocks:
+                blocks.pop()
+            key = None
+            continue
+
+        if quoted is not None:
+            token = quoted
+            if b"\\" in token:
+                token = _unescape(token.decode("utf-8", "replace")).encode()
+        elif token is None:
+            continue  # comment or conditional
+
+        if key is None:
+            key = token
+        else:
+            if key == value_key and blocks == parent_path:
+                return token.decode("utf-8", "replace")
+            key = None
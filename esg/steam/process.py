@@ -0,0 +1,119 @@
+from pathlib import Path
+from time import monotonic
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    import psutil
+
+# Names of the Steam client process
+STEAM_PROCESS_NAMES = frozenset(["steam.exe", "steam"])
+
+# Where Steam records the PID of its running client
+STEAM_REGISTRY_KEY = "Software\\Valve\\Steam\\ActiveProcess"
+STEAM_PID_FILE = Path("~/.steam/steam.pid")
+
+
+def _get_registry_pid() -> Optional[int]:
+    try:
+        import winreg
+    except ImportError:
+        return None
+
+    try:
+        with winreg.OpenKey(
+            winreg.HKEY_CURRENT_USER, STEAM_REGISTRY_KEY
+        ) as key:
+            pid, _ = winreg.QueryValueEx(key, "pid")
+    except OSError:
+        return None
+    return int(pid)
+
+
+def _get_pid_file_pid() -> Optional[int]:
+    try:
+        return int(STEAM_PID_FILE.expanduser().read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def get_steam_pid() -> Optional[int]:
+    """Get the PID Steam recorded for its client.
+
+    Returns `None` if Steam did not record one, and `0` if it recorded
+    that its client is not running. The PID may be stale if Steam did
+    not exit cleanly.
+    """
+
+    pid = _get_registry_pid()
+    if pid is None:
+        pid = _get_pid_file_pid()
+    return pid
+
+
+def _is_steam_process(process: "psutil.Process") -> bool:
+    return process.name().lower() in STEAM_PROCESS_NAMES
+
+
+def find_steam_process() -> "psutil.Process | None":
+    """Find the running Steam client process.
+
+    The PID recorded by Steam is checked first, which needs a single
+    process lookup. The processes are only enumerated, by name, when
+    Steam did not record a PID.
+    """
+
+    import psutil
+
+    pid = get_steam_pid()
+    if pid is not None:
+        if not pid:
+            return None
+        try:
+            process = psutil.Process(pid)
+            if _is_steam_process(process):
+                return process
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+        # a stale PID, Steam rewrites it when it starts again
+        return None
+
+    for process in psutil.process_iter(["name"]):
+        name = process.info["name"]
+        if name and name.lower() in STEAM_PROCESS_NAMES:
+            return process
+    return None
+
+
+def wait_for_exit(
+    process: "psutil.Process",
+    timeout: Optional[float] = None,
+    callback: Optional[Callable[[float], None]] = None,
+    interval: float = 1.0,
+) -> bool:
+    """Wait for a process to exit.
+
+    Waits on the process itself rather than polling the process list,
+    calling `callback` with the elapsed seconds every `interval` seconds
+    while it's still running. Returns whether the process exited before
+    `timeout` seconds, or waits indefinitely if `timeout` is `None`.
+    """
+
+    import psutil
+
+    start = monotonic()
+    while True:
+        elapsed = monotonic() - start
+        wait_time = interval
+        if timeout is not None:
+            if elapsed >= timeout:
+                return False
+            wait_time = min(interval, timeout - elapsed)
+
+        try:
+            process.wait(wait_time)
+            return True
+        except psutil.NoSuchProcess:
+            return True
+        except psutil.TimeoutExpired:
+            if callback:
+                callback(monotonic() - start)
@@ -1,15 +1,18 @@
 import logging
-from multiprocessing.sharedctypes import Value
 from pathlib import Path
-from os.path import expandvars
 from typing import NamedTuple
 
-import vdf
+from ..fileio import open_buffer
+from ..util import expand_path
+from .keyvalues import find_buffer_value
 
-DEFAULT_WINDOWS_USERDATA_PATH = expandvars(
+DEFAULT_WINDOWS_USERDATA_PATH = expand_path(
     "%ProgramFiles(x86)%\\Steam\\userdata"
 )
 
+# Key path of the profile name in a user's `localconfig.vdf`
+PERSONA_NAME_PATH = ("UserLocalConfigStore", "friends", "PersonaName")
+
 
 class Profile(NamedTuple):
     """Represents a Steam local user profile."""
@@ -42,18 +45,10 @@ class SteamProfiles:
             if not localconfig_path.exists():
                 continue
 
-            with open(localconfig_path, encoding="utf-8") as localconfig_file:
-                try:
-                    localconfig = vdf.load(localconfig_file)
-                except:
-                    localconfig = {}
+            with open_buffer(localconfig_path) as localconfig:
+                profile_name = find_buffer_value(localconfig, PERSONA_NAME_PATH)
 
             profile_id = user_path.name
-            profile_name = (
-                localconfig.get("UserLocalConfigStore")
-                .get("friends")
-                .get("PersonaName")
-            )
 
             if not profile_name:
                 profile_name = ""
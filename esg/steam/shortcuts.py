@@ -1,12 +1,358 @@
+from collections.abc import Mapping, MutableMapping
 from os import PathLike
 from pathlib import Path
+from struct import Struct
+from typing import Dict, Iterator, List, NamedTuple
 
+from ..fileio import open_buffer
+from ..util import atomic_write
 
+# ----------------------------------------------------------------------
+# Binary VDF codec
+# ----------------------------------------------------------------------
+TYPE_MAP = 0x00
+TYPE_STRING = 0x01
+TYPE_INT32 = 0x02
+TYPE_FLOAT32 = 0x03
+TYPE_POINTER = 0x04
+TYPE_WIDESTRING = 0x05
+TYPE_COLOR = 0x06
+TYPE_UINT64 = 0x07
+TYPE_END = 0x08
+TYPE_INT64 = 0x0A
+
+# Sizes of the fixed-size value types without a Python equivalent
+_FIXED_SIZES = {
+    TYPE_FLOAT32: 4,
+    TYPE_POINTER: 4,
+    TYPE_COLOR: 4,
+    TYPE_UINT64: 8,
+    TYPE_INT64: 8,
+}
+
+_INT32 = Struct("<i")
+_UINT32 = Struct("<I")
+_INT64 = Struct("<q")
+_UINT64 = Struct("<Q")
+
+# Level of the shortcut entries: root -> "shortcuts" -> "0", "1", ...
+_SHORTCUT_LEVEL = 2
+
+
+class RawValue(NamedTuple):
+    """A binary VDF value with no Python equivalent, kept verbatim."""
+
+    type: int
+    data: bytes
+
+
+class Shortcut(MutableMapping):
+    """A single entry of a `shortcuts.vdf` file.
+
+    Behaves like a mapping of the entry's fields. The fields Steam writes
+    are stored in slots, anything else in an extra dictionary, and the
+    order of the fields is kept so an entry is written back exactly as
+    it was read.
+    """
+
+    FIELDS = (
+        "appid",
+        "AppName",
+        "Exe",
+        "StartDir",
+        "icon",
+        "ShortcutPath",
+        "LaunchOptions",
+        "IsHidden",
+        "AllowDesktopConfig",
+        "AllowOverlay",
+        "OpenVR",
+        "Devkit",
+        "DevkitGameID",
+        "DevkitOverrideAppID",
+        "LastPlayTime",
+        "FlatpakAppID",
+        "tags",
+    )
+
+    __slots__ = FIELDS + ("_keys", "_extra")
+
+    # Field orders shared between entries, most entries have the same
+    _key_orders: Dict[tuple, tuple] = {}
+
+    def __init__(self, fields=()):
+        self._keys = ()
+        self._extra = None
+        for key, value in dict(fields).items():
+            self[key] = value
+
+    def _set_keys(self, keys):
+        self._keys = self._key_orders.setdefault(keys, keys)
+
+    def __getitem__(self, key):
+        if key in _FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._set_keys(self._keys + (key,))
+        if key in _FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._set_keys(tuple(k for k in self._keys if k != key))
+        if key in _FIELDS:
+            delattr(self, key)
+        else:
+            del self._extra[key]
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self):
+        return f"Shortcut({dict(self)!r})"
+
+
+_FIELDS = frozenset(Shortcut.FIELDS)
+
+
+class _Reader:
+    """Decodes binary VDF data straight from a buffer.
+
+    Values are sliced out of the buffer one field at a time, the buffer
+    itself is never copied unless it can't be searched, like a plain
+    `memoryview`, or its slices can't be hashed, like a `bytearray`.
+    """
+
+    def __init__(self, data):
+        if not hasattr(data, "find") or isinstance(data, bytearray):
+            data = bytes(data)
+        self._data = data
+        self._find = data.find
+        self._pos = 0
+        self._keys = {}
+
+    def _find_end(self, pos: int) -> int:
+        end = self._find(b"\x00", pos)
+        if end < 0:
+            raise ValueError(f"Unterminated string at offset {pos}")
+        return end
+
+    def _read_widestring(self, pos: int) -> int:
+        start = pos
+        while True:
+            end = self._find(b"\x00\x00", pos)
+            if end < 0:
+                raise ValueError(f"Unterminated string at offset {start}")
+            if (end - start) % 2 == 0:
+                return end + 2
+            pos = end + 1
+
+    def read_map(self, level=0):
+        """Read map items up to the end of the map or of the data."""
+
+        # hot loop, keep everything in locals
+        data = self._data
+        size = len(data)
+        keys = self._keys
+        find_end = self._find_end
+        unpack_int32 = _INT32.unpack_from
+        pos = self._pos
+
+        values = {}
+        while pos < size:
+            value_type = data[pos]
+            if value_type == TYPE_END:
+                pos += 1
+                break
+
+            # keys repeat in every entry, decode each of them once
+            end = find_end(pos + 1)
+            raw_key = data[pos + 1 : end]
+            key = keys.get(raw_key)
+            if key is None:
+                key = raw_key.decode("utf-8", "surrogateescape")
+                keys[raw_key] = key
+            pos = end + 1
+
+            if value_type == TYPE_STRING:
+                end = find_end(pos)
+                values[key] = data[pos:end].decode("utf-8", "surrogateescape")
+                pos = end + 1
+            elif value_type == TYPE_INT32:
+                (values[key],) = unpack_int32(data, pos)
+                pos += 4
+            elif value_type == TYPE_MAP:
+                self._pos = pos
+                values[key] = self.read_map(level + 1)
+                pos = self._pos
+            elif value_type in _FIXED_SIZES:
+                end = pos + _FIXED_SIZES[value_type]
+                values[key] = RawValue(value_type, bytes(data[pos:end]))
+                pos = end
+            elif value_type == TYPE_WIDESTRING:
+                end = self._read_widestring(pos)
+                values[key] = RawValue(value_type, bytes(data[pos:end]))
+                pos = end
+            else:
+                raise ValueError(
+                    f"Unknown value type {value_type:#x} at offset {pos}"
+                )
+
+        self._pos = pos
+        if level != _SHORTCUT_LEVEL:
+            return values
+
+        # fill the slots directly instead of going through __setitem__
+        shortcut = Shortcut()
+        shortcut._set_keys(tuple(values))
+        for key, value in values.items():
+            if key in _FIELDS:
+                setattr(shortcut, key, value)
+            else:
+                if shortcut._extra is None:
+                    shortcut._extra = {}
+                shortcut._extra[key] = value
+        return shortcut
+
+
+def loads(data) -> dict:
+    """Decode the content of a `shortcuts.vdf` file.
+
+    `data` can be any object supporting the buffer protocol, such as
+    `bytes` or an `mmap`, which is decoded in place without copying it.
+    Returns `{"shortcuts": {"0": Shortcut, ...}}`.
+    """
+
+    shortcuts = _Reader(data).read_map()
+    shortcuts.setdefault("shortcuts", {})
+    return shortcuts
+
+
+_key_cache: Dict[str, bytes] = {}
+
+
+def _encode_key(key: str) -> bytes:
+    encoded = _key_cache.get(key)
+    if encoded is None:
+        encoded = _key_cache[key] = key.encode("utf-8", "surrogateescape")
+    return encoded
+
+
+def _encode_int(value: int):
+    """Get the binary VDF type and data of an integer.
+
+    Integers are written as 32-bit values when they fit, unsigned app
+    IDs with the same bits as signed ones, and as 64-bit values
+    otherwise, like the `UINT_64` and `INT_64` types of `vdf`.
+    """
+
+    if -0x80000000 <= value < 0x80000000:
+        return TYPE_INT32, _INT32.pack(value)
+    if 0 <= value < 0x100000000:
+        return TYPE_INT32, _UINT32.pack(value)
+    if 0 <= value < 0x10000000000000000:
+        return TYPE_UINT64, _UINT64.pack(value)
+    if -0x8000000000000000 <= value < 0:
+        return TYPE_INT64, _INT64.pack(value)
+    raise ValueError(f"Integer out of range: {value}")
+
+
+def _write_map(buffer: bytearray, mapping):
+    for key, value in mapping.items():
+        key = _encode_key(key)
+        if isinstance(value, RawValue):
+            buffer.append(value.type)
+            buffer += key
+            buffer.append(0)
+            buffer += value.data
+        elif isinstance(value, str):
+            buffer.append(TYPE_STRING)
+            buffer += key
+            buffer.append(0)
+            buffer += value.encode("utf-8", "surrogateescape")
+            buffer.append(0)
+        elif isinstance(value, int):
+            value_type, data = _encode_int(value)
+            buffer.append(value_type)
+            buffer += key
+            buffer.append(0)
+            buffer += data
+        elif isinstance(value, Mapping):
+            buffer.append(TYPE_MAP)
+            buffer += key
+            buffer.append(0)
+            _write_map(buffer, value)
+        else:
+            raise TypeError(f"Unsupported value type: {type(value)}")
+    buffer.append(TYPE_END)
+
+
+def dump(shortcuts, fp):
+    """Encode shortcuts like `dumps`, writing them to a file object."""
+
+    fp.write(dumps(shortcuts))
+
+
+def dumps(shortcuts) -> bytes:
+    """Encode shortcuts into the content of a `shortcuts.vdf` file.
+
+    `shortcuts` has the shape returned by `loads`, entries can be either
+    `Shortcut` records or plain dictionaries.
+    """
+
+    buffer = bytearray()
+    _write_map(buffer, shortcuts)
+    return bytes(buffer)
+
+
+# ----------------------------------------------------------------------
+# Shortcuts file
+# ----------------------------------------------------------------------
 class SteamShortcuts:
+    """Represents the shortcuts of a Steam user's `shortcuts.vdf` file."""
+
     def __init__(self, config_path: str | bytes | PathLike) -> None:
         shortcuts_path = Path(config_path) / "shortcuts.vdf"
 
-        if not shortcuts_path.is_dir():
-            raise IsADirectoryError(config_path)
+        if shortcuts_path.is_dir():
+            raise IsADirectoryError(shortcuts_path)
 
         self._shortcuts_path = shortcuts_path
+        self._shortcuts: List[Shortcut] = []
+
+    def load(self) -> None:
+        try:
+            with open_buffer(self._shortcuts_path) as data:
+                shortcuts = loads(data)["shortcuts"]
+        except FileNotFoundError:
+            shortcuts = {}
+        self._shortcuts = list(shortcuts.values())
+
+    def save(self) -> None:
+        shortcuts = {str(i): s for i, s in enumerate(self._shortcuts)}
+        atomic_write(self._shortcuts_path, dumps({"shortcuts": shortcuts}))
+
+    def count(self):
+        return len(self._shortcuts)
+
+    def list(self):
+        return self._shortcuts
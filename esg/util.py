@@ -1,3 +1,10 @@
+import ntpath
+from hashlib import sha256
+from os import chmod, fdopen, fsync, link, replace, sep, umask
+from pathlib import Path
+from shutil import copyfile, copymode
+from tempfile import mkstemp
+
 from click import echo, secho, style
 
 
@@ -13,6 +20,17 @@ def echo_debug(message):
     echo(f"[{style('debug', fg='magenta')}] {message}")
 
 
+def expand_path(path: str) -> Path:
+    """Expand the `%VAR%` environment variables of a Windows path.
+
+    Variables are expanded and backslashes converted on any OS, so the
+    app's paths can be pointed elsewhere through their variables, e.g.
+    to the benchmark fixtures.
+    """
+
+    return Path(ntpath.expandvars(path).replace("\\", sep))
+
+
 def unquote_string(quoted_string):
     return quoted_string[1:-1]
 
@@ -57,3 +75,129 @@ def truncate_default_shortcut_fields(shortcut: dict) -> dict:
             truncated_shortcut[key] = value
 
     return truncated_shortcut
+
+
+def _get_umask() -> int:
+    # the umask can only be read by setting it
+    mask = umask(0)
+    umask(mask)
+    return mask
+
+
+# Mode of the files created by the app, as `open` would create them
+_FILE_MODE = 0o666 & ~_get_umask()
+
+
+def atomic_write(path, data: bytes):
+    """Write bytes to a file atomically.
+
+    The data is written and flushed to a temporary file next to `path`
+    first, which then replaces `path` in a single rename. Readers either
+    see the old file or the new one, never a partially written file.
+    The file keeps its permissions, or gets the default ones if new.
+    """
+
+    path = Path(path)
+    fd, temp_path = mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with fdopen(fd, "wb") as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            fsync(temp_file.fileno())
+        # temporary files are only readable by their owner
+        try:
+            copymode(path, temp_path)
+        except FileNotFoundError:
+            chmod(temp_path, _FILE_MODE)
+        replace(temp_path, path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
+def file_matches(path, data: bytes) -> bool:
+    """Whether a file exists and its content is `data`.
+
+    Compares the sizes first, then the SHA-256 hashes of the contents,
+    reading the file a chunk at a time.
+    """
+
+    try:
+        if Path(path).stat().st_size != len(data):
+            return False
+        digest = sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(64 * 1024), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return False
+    return digest.digest() == sha256(data).digest()
+
+
+def backup_file(path, count: int):
+    """Keep a rotating set of `count` backups of a file.
+
+    The backups are named after the file with a `.1.bak` to `.{count}.bak`
+    suffix, `.1.bak` being the most recent one. The backup is a link to
+    the file, so the file must then be replaced rather than modified in
+    place, e.g. with `atomic_write`.
+    """
+
+    path = Path(path)
+    if count < 1 or not path.is_file():
+        return
+
+    backup_paths = [
+        path.with_name(f"{path.name}.{i}.bak") for i in range(1, count + 1)
+    ]
+    # already backed up, e.g. by a previous save that failed
+    if backup_paths[0].is_file() and backup_paths[0].samefile(path):
+        return
+
+    for older, newer in zip(backup_paths[:0:-1], backup_paths[-2::-1]):
+        if newer.is_file():
+            replace(newer, older)
+    link_file(path, backup_paths[0])
+
+
+# ioctl request to clone a file's extents, on Linux (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+
+def _reflink(source, target):
+    import fcntl  # not available on Windows
+
+    with open(source, "rb") as source_file, open(target, "wb") as target_file:
+        fcntl.ioctl(target_file.fileno(), FICLONE, source_file.fileno())
+
+
+def link_file(source, target):
+    """Make `target` a copy of `source` that shares its storage.
+
+    Hard-links the file if possible, otherwise clones it on file systems
+    supporting it, and copies it as a last resort, e.g. across volumes.
+    `target` is replaced atomically if it exists. Returns how the file
+    was linked: `"hardlink"`, `"reflink"` or `"copy"`.
+    """
+
+    target = Path(target)
+    temp_path = target.with_name(f".{target.name}.tmp")
+    temp_path.unlink(missing_ok=True)
+    try:
+        try:
+            link(source, temp_path)
+            method = "hardlink"
+        except OSError:
+            try:
+                _reflink(source, temp_path)
+                method = "reflink"
+            except (ImportError, OSError):
+                copyfile(source, temp_path)
+                method = "copy"
+        replace(temp_path, target)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return method
@@ -0,0 +1,195 @@
+from threading import Event
+from time import monotonic
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from esg.game import Game
+from esg.main import DaemonExecutor, get_provider_result
+from esg.steam import get_shortcuts_path, load_shortcuts, save_shortcuts
+
+# Default seconds between two checks of the launchers' manifests
+DEFAULT_POLL_INTERVAL = 2.0
+
+# Default seconds without any new change before changes are applied
+DEFAULT_SETTLE_TIME = 5.0
+
+
+def _list_manifests(provider):
+    return list(provider.list_manifests())
+
+
+def _stat_key(path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# ----------------------------------------------------------------------
+# Manifests
+# ----------------------------------------------------------------------
+class PollingWatcher:
+    """Watches the manifests of the launchers' installed games.
+
+    Manifests are listed with each provider every `interval` seconds and
+    compared by modification time and size, which works on any OS and
+    file system, network drives included. The GOG library path is read
+    from the Galaxy config on each check, so moving it is picked up.
+
+    A launcher that fails to list its manifests, or that takes longer
+    than its provider's timeout, is reported once to `on_error`, with
+    the provider and the error, and its manifests are assumed unchanged
+    until it lists them again. A listing that timed out isn't started
+    again until it's done.
+    """
+
+    def __init__(
+        self,
+        providers,
+        interval: float = DEFAULT_POLL_INTERVAL,
+        settle: float = DEFAULT_SETTLE_TIME,
+        on_error=None,
+    ):
+        self._providers = providers
+        self._interval = interval
+        self._settle = settle
+        self._on_error = on_error
+        self._failed = set()
+        self._stopped = Event()
+        self._executor = DaemonExecutor(max(1, len(providers)))
+        # listings that timed out, by platform
+        self._listings = {}
+        self._snapshot = {}
+        self._snapshot = self.scan()
+
+    def _list_manifests(self, provider):
+        listing = self._listings.pop(provider.platform, None)
+        timeout = 0  # still running since an earlier scan
+        if listing is None:
+            listing = self._executor.submit(_list_manifests, provider)
+            timeout = provider.timeout
+        try:
+            return get_provider_result(listing, provider, timeout)
+        except TimeoutError:
+            self._listings[provider.platform] = listing
+            raise
+
+    def scan(self) -> Dict[str, Tuple]:
+        """Get the modification time and size of every manifest."""
+
+        snapshot = {}
+        for provider in self._providers:
+            try:
+                paths = self._list_manifests(provider)
+            except Exception as error:
+                if provider.platform not in self._failed:
+                    self._failed.add(provider.platform)
+                    if self._on_error:
+                        self._on_error(provider, error)
+                # keep the last known manifests of the launcher
+                for path, key in self._snapshot.items():
+                    if key[0] == provider.platform:
+                        snapshot[path] = key
+                continue
+
+            self._failed.discard(provider.platform)
+            for path in paths:
+                stat_key = _stat_key(path)
+                if stat_key:
+                    snapshot[str(path)] = (provider.platform, *stat_key)
+        return snapshot
+
+    def wait_for_changes(self) -> Optional[List[str]]:
+        """Wait for manifests to change, then for them to settle.
+
+        Returns once no manifest changed for `settle` seconds, with the
+        paths of the manifests that were added, changed or removed.
+        Returns `None` if the watcher was stopped.
+        """
+
+        previous = self._snapshot
+        current = previous
+        while current == previous:
+            if self._stopped.wait(self._interval):
+                return None
+            current = self.scan()
+
+        # wait for a burst of changes, e.g. an install, to be done
+        changed_at = monotonic()
+        while monotonic() - changed_at < self._settle:
+            if self._stopped.wait(self._interval):
+                return None
+            latest = self.scan()
+            if latest != current:
+                current = latest
+                changed_at = monotonic()
+
+        self._snapshot = current
+        return sorted(
+            path
+            for path in previous.keys() | current.keys()
+            if previous.get(path) != current.get(path)
+        )
+
+    def stop(self):
+        """Stop waiting for changes, from another thread."""
+
+        self._stopped.set()
+
+
+# ----------------------------------------------------------------------
+# Games and shortcuts
+# ----------------------------------------------------------------------
+class GameChanges(NamedTuple):
+    """The games installed, updated and uninstalled between two scans."""
+
+    added: List[Game]
+    updated: List[Game]
+    removed: List[Game]
+
+
+def diff_games(old_games, new_games) -> GameChanges:
+    """Compare two lists of games by platform and ID."""
+
+    old_index = {game.key: game for game in old_games}
+    new_index = {game.key: game for game in new_games}
+    return GameChanges(
+        added=[g for k, g in new_index.items() if k not in old_index],
+        updated=[
+            g
+            for k, g in new_index.items()
+            if k in old_index and old_index[k] != g
+        ],
+        removed=[g for k, g in old_index.items() if k not in new_index],
+    )
+
+
+class ShortcutsFile:
+    """A Steam user's shortcuts, kept in memory between syncs.
+
+    `shortcuts.vdf` is only loaded again when it changed on disk since
+    it was last loaded or saved, e.g. when Steam saved it on exit.
+    """
+
+    def __init__(self, steam_id):
+        self.steam_id = steam_id
+        self._path = get_shortcuts_path(steam_id)
+        self._shortcuts = None
+        self._stat_key = None
+
+    def load(self) -> dict:
+        """Get the shortcuts, by index."""
+
+        stat_key = _stat_key(self._path)
+        if self._shortcuts is None or stat_key != self._stat_key:
+            self._shortcuts = load_shortcuts(self.steam_id)["shortcuts"]
+            self._stat_key = stat_key
+        return self._shortcuts
+
+    def save(self, shortcuts) -> bool:
+        """Save the shortcuts, returns whether the file was written."""
+
+        saved = save_shortcuts(self.steam_id, {"shortcuts": shortcuts})
+        self._shortcuts = shortcuts
+        self._stat_key = _stat_key(self._path)
+        return saved
@@ -0,0 +1,101 @@
+from gzip import compress
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import NamedTuple
+
+import pytest
+
+from esg.steam import get_shortcuts_path
+
+# ID of the Steam user of the `shortcuts_path` fixture
+STEAM_ID = "12345"
+
+
+class StubRequest(NamedTuple):
+    """A request received by the stub server."""
+
+    path: str
+    headers: dict
+    # the client's port, which stays the same on a kept alive connection
+    port: int
+
+
+class StubServer:
+    """A local HTTP server answering with the responses of its routes.
+
+    `routes` maps request paths, query included, to functions called
+    with the `StubRequest` and returning `(status, headers, body)`.
+    Bodies are gzip compressed when the client accepts it.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self._lock = Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        ).start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def requests_to(self, path):
+        with self._lock:
+            return [r for r in self.requests if r.path == path]
+
+    def handle(self, request):
+        with self._lock:
+            self.requests.append(request)
+        route = self.routes.get(request.path)
+        if route is None:
+            return 404, {}, b"Not found"
+        return route(request)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        request = StubRequest(
+            self.path, dict(self.headers), self.client_address[1]
+        )
+        status, headers, body = self.server.stub.handle(request)
+        if body and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = compress(body)
+            headers = {**headers, "Content-Encoding": "gzip"}
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def shortcuts_path(tmp_path, monkeypatch):
+    """Point the Steam userdata directory to a temporary one, with the
+    config directory of user `STEAM_ID`."""
+
+    monkeypatch.setenv("ProgramFiles(x86)", str(tmp_path))
+    config_path = tmp_path / "Steam" / "userdata" / STEAM_ID / "config"
+    config_path.mkdir(parents=True)
+    return get_shortcuts_path(STEAM_ID)
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+from esg.platforms.epic import EpicCatalog, get_grid_image_url
+
+LIBRARY = {"a": "ns-a", "b": "ns-b", "c": "ns-c"}
+
+
+class FakeEpicSession:
+    """An `EpicSession` answering from a local library, counting the
+    requests made to the Epic services."""
+
+    def __init__(self, logged_in=True):
+        self.started = False
+        self.logged_in = logged_in
+        self.requests = []
+        self.core = SimpleNamespace(
+            egs=SimpleNamespace(
+                get_library_items=self._get_library_items,
+                get_game_info=self._get_game_info,
+            )
+        )
+
+    def login(self):
+        self.started = True
+        return self.logged_in
+
+    def _get_library_items(self):
+        self.requests.append("library")
+        return [
+            {"catalogItemId": id, "namespace": namespace}
+            for id, namespace in LIBRARY.items()
+        ]
+
+    def _get_game_info(self, namespace, catalog_item_id):
+        self.requests.append(catalog_item_id)
+        assert LIBRARY[catalog_item_id] == namespace
+        return {
+            "keyImages": [
+                {"type": "DieselGameBoxTall", "url": f"tall/{namespace}"},
+                {"type": "DieselGameBox", "url": f"wide/{namespace}"},
+            ]
+        }
+
+
+def test_get_grid_image_url():
+    key_images = FakeEpicSession()._get_game_info("ns-a", "a")["keyImages"]
+    assert get_grid_image_url(key_images) == "wide/ns-a"
+    assert get_grid_image_url(key_images[:1]) is None
+
+
+def test_catalog_requests_missing_items(tmp_path):
+    session = FakeEpicSession()
+    catalog = EpicCatalog(tmp_path, session=session)
+    key_images = catalog.get_key_images(["a", "b", "unknown"])
+    assert sorted(key_images) == ["a", "b"]
+    assert sorted(session.requests) == ["a", "b", "library"]
+
+    # only the new item is requested by the next run
+    session = FakeEpicSession()
+    catalog = EpicCatalog(tmp_path, session=session)
+    assert sorted(catalog.get_key_images(["a", "b", "c"])) == ["a", "b", "c"]
+    assert sorted(session.requests) == ["c", "library"]
+
+
+def test_catalog_fresh_entries_need_no_login(tmp_path):
+    EpicCatalog(tmp_path, session=FakeEpicSession()).get_key_images(["a"])
+
+    session = FakeEpicSession()
+    EpicCatalog(tmp_path, session=session).get_key_images(["a"])
+    assert session.requests == []
+    assert not session.started
+
+
+def test_catalog_refresh(tmp_path):
+    EpicCatalog(tmp_path, session=FakeEpicSession()).get_key_images(["a"])
+
+    session = FakeEpicSession()
+    EpicCatalog(tmp_path, session=session, max_age=0).get_key_images(["a"])
+    assert sorted(session.requests) == ["a", "library"]
+
+
+def test_catalog_dry_run(tmp_path):
+    cache_path = tmp_path / "state"
+    catalog = EpicCatalog(cache_path, session=FakeEpicSession(), dry_run=True)
+    assert sorted(catalog.get_key_images(["a"])) == ["a"]
+    assert not cache_path.exists()
+
+
+def test_catalog_logged_out(tmp_path):
+    session = FakeEpicSession(logged_in=False)
+    catalog = EpicCatalog(tmp_path, session=session)
+    assert catalog.get_key_images(["a"]) == {}
+    assert session.requests == []
@@ -0,0 +1,61 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from esg.cache import ArtworkCache
+from esg.grid import GridJob, GridStore, process_grid_jobs
+
+
+def make_image():
+    buffer = BytesIO()
+    Image.new("RGB", (600, 900), "red").save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def pipeline(stub_server, tmp_path):
+    cache_path, store_path = tmp_path / "cache", tmp_path / "store"
+    cache_path.mkdir()
+    store_path.mkdir()
+    return ArtworkCache(cache_path), GridStore(store_path)
+
+
+def run_job(stub_server, pipeline, tmp_path, path):
+    job = GridJob(
+        name="Game",
+        url=f"{stub_server.url}{path}",
+        targets={"portrait": [tmp_path / "1p.jpg"]},
+    )
+    ((_, error),) = process_grid_jobs([job], *pipeline)
+    return error
+
+
+def test_process_grid_jobs(stub_server, pipeline, tmp_path):
+    image = make_image()
+    stub_server.routes["/cover.jpg"] = lambda request: (200, {}, image)
+
+    assert run_job(stub_server, pipeline, tmp_path, "/cover.jpg") is None
+    assert Image.open(tmp_path / "1p.jpg").size == (600, 900)
+
+    # the source image is served from the cache
+    (tmp_path / "1p.jpg").unlink()
+    assert run_job(stub_server, pipeline, tmp_path, "/cover.jpg") is None
+    assert len(stub_server.requests_to("/cover.jpg")) == 1
+
+
+def test_failed_render_drops_cached_source(stub_server, pipeline, tmp_path):
+    stub_server.routes["/cover.jpg"] = lambda request: (
+        200,
+        {"Content-Type": "text/html"},
+        b"<html>Service unavailable</html>",
+    )
+
+    assert run_job(stub_server, pipeline, tmp_path, "/cover.jpg")
+    assert not (tmp_path / "1p.jpg").exists()
+
+    # downloaded again instead of being served from the cache
+    image = make_image()
+    stub_server.routes["/cover.jpg"] = lambda request: (200, {}, image)
+    assert run_job(stub_server, pipeline, tmp_path, "/cover.jpg") is None
+    assert len(stub_server.requests_to("/cover.jpg")) == 2
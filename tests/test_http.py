@@ -0,0 +1,242 @@
+from json import dumps as json_dump
+
+import pytest
+from requests import HTTPError
+
+import esg.grid
+from esg.cache import ArtworkCache
+from esg.grid import get_cached_gog_stats, get_gog_stats
+from esg.http import HttpSession
+
+STATS_PATH = "/u/alice/games/stats"
+
+
+def respond(status=200, body=b"", headers=None):
+    return lambda request: (status, headers or {}, body)
+
+
+def respond_in_turn(*responses):
+    """Answer with each response in turn, then with the last one."""
+
+    responses = list(responses)
+
+    def route(request):
+        response = responses.pop(0) if len(responses) > 1 else responses[0]
+        return response(request)
+
+    return route
+
+
+@pytest.fixture
+def session():
+    session = HttpSession(pool_size=4, retries=2, backoff_factor=0)
+    yield session
+    session.close()
+
+
+# ----------------------------------------------------------------------
+# HttpSession
+# ----------------------------------------------------------------------
+def test_gzip_and_timings(stub_server, session):
+    stub_server.routes["/data"] = respond(body=b"x" * 1000)
+
+    res = session.get(f"{stub_server.url}/data")
+    assert res.content == b"x" * 1000
+    assert res.headers["Content-Encoding"] == "gzip"
+
+    (timing,) = session.timings()
+    assert (timing.method, timing.status) == ("GET", 200)
+    host = stub_server.url.split("//")[1]
+    assert session.summary()[host]["requests"] == 1
+
+
+def test_keeps_connections_alive(stub_server, session):
+    stub_server.routes["/data"] = respond(body=b"data")
+    for _ in range(3):
+        session.get(f"{stub_server.url}/data")
+    ports = {request.port for request in stub_server.requests}
+    assert len(ports) == 1
+
+
+@pytest.mark.parametrize("status", [500, 502, 503, 504, 429])
+def test_retries_server_errors(stub_server, session, status):
+    stub_server.routes["/flaky"] = respond_in_turn(
+        respond(status), respond(status), respond(body=b"ok")
+    )
+    res = session.get(f"{stub_server.url}/flaky")
+    assert res.status_code == 200
+    assert res.content == b"ok"
+    assert len(stub_server.requests_to("/flaky")) == 3
+
+
+def test_gives_up_after_retries(stub_server, session):
+    stub_server.routes["/down"] = respond(503)
+    res = session.get(f"{stub_server.url}/down")
+    assert res.status_code == 503
+    assert len(stub_server.requests_to("/down")) == 3
+
+
+def test_backs_off_between_retries(stub_server, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("time.sleep", sleeps.append)
+    stub_server.routes["/down"] = respond(503)
+
+    session = HttpSession(retries=3, backoff_factor=0.5)
+    session.get(f"{stub_server.url}/down")
+    session.close()
+    # the first retry is immediate, then the delay doubles
+    assert [s for s in sleeps if s] == [1.0, 2.0]
+
+
+def test_does_not_retry_client_errors(stub_server, session):
+    res = session.get(f"{stub_server.url}/missing")
+    assert res.status_code == 404
+    assert len(stub_server.requests_to("/missing")) == 1
+
+
+# ----------------------------------------------------------------------
+# GOG stats
+# ----------------------------------------------------------------------
+def stats_page(stub_server, page, pages=None, ids=(), next_page=None):
+    body = {
+        "page": page,
+        "_embedded": {
+            "items": [
+                {"game": {"id": id, "image": f"https://img/{id}"}} for id in ids
+            ]
+        },
+        "_links": {},
+    }
+    if pages is not None:
+        body["pages"] = pages
+    if next_page:
+        body["_links"]["next"] = {
+            "href": f"{stub_server.url}{STATS_PATH}?page={next_page}"
+        }
+    return respond(body=json_dump(body).encode())
+
+
+@pytest.fixture
+def gog_url(stub_server, monkeypatch):
+    monkeypatch.setattr(esg.grid, "GOG_URL", stub_server.url)
+
+
+def test_gog_stats_pages(stub_server, session, gog_url):
+    routes = stub_server.routes
+    routes[STATS_PATH] = stats_page(stub_server, 1, 3, ["1", "2"], 2)
+    routes[f"{STATS_PATH}?page=2"] = stats_page(stub_server, 2, 3, ["3"], 3)
+    routes[f"{STATS_PATH}?page=3"] = stats_page(stub_server, 3, 3, ["4"])
+
+    games = get_gog_stats("alice", session)
+    assert sorted(games) == ["1", "2", "3", "4"]
+    assert games["3"] == {"image": "https://img/3"}
+    assert len(stub_server.requests) == 3
+
+
+@pytest.fixture
+def no_thread_pool(monkeypatch):
+    """Fail if the GOG stats pages are requested on a thread pool."""
+
+    monkeypatch.setattr(esg.grid, "ThreadPoolExecutor", None)
+
+
+def test_gog_stats_single_page(stub_server, session, gog_url, no_thread_pool):
+    stub_server.routes[STATS_PATH] = stats_page(stub_server, 1, 1, ["1"])
+    assert sorted(get_gog_stats("alice", session)) == ["1"]
+
+
+def test_gog_stats_next_links(stub_server, session, gog_url, no_thread_pool):
+    routes = stub_server.routes
+    routes[STATS_PATH] = stats_page(stub_server, 1, ids=["1"], next_page=2)
+    routes[f"{STATS_PATH}?page=2"] = stats_page(
+        stub_server, 2, ids=["2"], next_page=3
+    )
+    routes[f"{STATS_PATH}?page=3"] = stats_page(stub_server, 3, ids=["3"])
+
+    games = get_gog_stats("alice", session)
+    assert sorted(games) == ["1", "2", "3"]
+
+
+def test_gog_stats_unknown_user(stub_server, session, gog_url):
+    assert get_gog_stats("alice", session) is None
+
+
+def test_gog_stats_page_error(stub_server, session, gog_url):
+    routes = stub_server.routes
+    routes[STATS_PATH] = stats_page(stub_server, 1, 2, ["1"], 2)
+
+    with pytest.raises(HTTPError, match="404"):
+        get_gog_stats("alice", session)
+
+
+def test_cached_gog_stats(stub_server, session, gog_url, tmp_path):
+    stub_server.routes[STATS_PATH] = stats_page(stub_server, 1, 1, ["1"])
+
+    games = get_cached_gog_stats("alice", tmp_path, session=session)
+    assert get_cached_gog_stats("alice", tmp_path, session=session) == games
+    assert len(stub_server.requests) == 1
+
+    get_cached_gog_stats("alice", tmp_path, max_age=0, session=session)
+    assert len(stub_server.requests) == 2
+
+
+def test_cached_gog_stats_dry_run(stub_server, session, gog_url, tmp_path):
+    stub_server.routes[STATS_PATH] = stats_page(stub_server, 1, 1, ["1"])
+    cache_path = tmp_path / "state"
+
+    games = get_cached_gog_stats(
+        "alice", cache_path, session=session, dry_run=True
+    )
+    assert sorted(games) == ["1"]
+    assert not cache_path.exists()
+
+
+# ----------------------------------------------------------------------
+# ArtworkCache
+# ----------------------------------------------------------------------
+def respond_image(body, etag):
+    def route(request):
+        if request.headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag}, body
+
+    return route
+
+
+def test_artwork_cache_conditional_requests(stub_server, session, tmp_path):
+    url = f"{stub_server.url}/cover.jpg"
+    stub_server.routes["/cover.jpg"] = respond_image(b"cover v1", '"v1"')
+
+    cache = ArtworkCache(tmp_path, max_age=0, session=session)
+    path = cache.fetch(url)
+    assert path.read_bytes() == b"cover v1"
+
+    # stale, revalidated without downloading it again
+    assert cache.fetch(url) == path
+    requests = stub_server.requests_to("/cover.jpg")
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert len(requests) == 2
+
+    # changed upstream, downloaded again
+    stub_server.routes["/cover.jpg"] = respond_image(b"cover v2", '"v2"')
+    new_path = cache.fetch(url)
+    assert new_path != path
+    assert new_path.read_bytes() == b"cover v2"
+
+
+def test_artwork_cache_fresh_entries(stub_server, session, tmp_path):
+    url = f"{stub_server.url}/cover.jpg"
+    stub_server.routes["/cover.jpg"] = respond_image(b"cover", '"v1"')
+
+    cache = ArtworkCache(tmp_path, session=session)
+    cache.fetch(url)
+    cache.save()
+    assert ArtworkCache(tmp_path, session=session).fetch(url).is_file()
+    assert len(stub_server.requests_to("/cover.jpg")) == 1
+
+
+def test_artwork_cache_not_found(stub_server, session, tmp_path):
+    cache = ArtworkCache(tmp_path, session=session)
+    with pytest.raises(HTTPError, match="404"):
+        cache.fetch(f"{stub_server.url}/missing.jpg")
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,56 @@
+import pytest
+
+from esg.steam import (
+    create_shortcut,
+    generate_old_steam_id,
+    generate_steam_id,
+    get_grid_file_names,
+)
+from esg.steam.ids import ShortcutIds, get_all_shortcut_ids, get_shortcut_ids
+from esg.steam.shortcuts import dumps, loads
+
+# the CRC-32 of '"{exe}"{name}' with the top bit set, and the IDs Steam
+# derives from it
+SHORTCUTS = [
+    (
+        "C:\\Games\\Cyberpunk 2077\\bin\\x64\\Cyberpunk2077.exe",
+        "Cyberpunk 2077",
+        ShortcutIds(3986338687, 17121194291478134784, -308628609),
+    ),
+    (
+        "C:\\GOG Games\\Gwent\\Gwent.exe",
+        "Gwent",
+        ShortcutIds(4159048583, 17862977646493696000, -135918713),
+    ),
+]
+
+
+@pytest.mark.parametrize("exe, name, ids", SHORTCUTS)
+def test_shortcut_ids(exe, name, ids):
+    assert get_shortcut_ids(exe, name) == ids
+    assert generate_steam_id(exe, name) == f"{ids.grid_id}p"
+    assert generate_old_steam_id(exe, name) == str(ids.legacy_id)
+
+
+@pytest.mark.parametrize("exe, name, ids", SHORTCUTS)
+def test_create_shortcut_appid(exe, name, ids):
+    shortcut = create_shortcut(name, exe)
+    assert shortcut["appid"] == ids.app_id
+    # stored as a signed 32-bit integer, like Steam does
+    shortcuts = {"shortcuts": {"0": shortcut}}
+    assert loads(dumps(shortcuts))["shortcuts"]["0"]["appid"] == ids.app_id
+
+
+def test_all_shortcut_ids():
+    shortcuts = [create_shortcut(name, exe) for exe, name, _ in SHORTCUTS]
+    assert get_all_shortcut_ids(shortcuts) == [ids for *_, ids in SHORTCUTS]
+
+
+def test_grid_file_names():
+    ids = SHORTCUTS[0][2]
+    assert get_grid_file_names(ids) == {
+        "grid": ["3986338687.jpg", "17121194291478134784.jpg"],
+        "portrait": ["3986338687p.jpg"],
+        "hero": ["3986338687_hero.jpg"],
+        "logo": ["3986338687_logo.png"],
+    }
@@ -0,0 +1,73 @@
+from time import perf_counter
+
+import pytest
+
+from esg.fileio import open_buffer
+from esg.steam.keyvalues import find_buffer_value
+
+PERSONA_NAME_PATH = ("UserLocalConfigStore", "friends", "PersonaName")
+
+LOCALCONFIG = rb"""
+"UserLocalConfigStore"
+{
+    // braces in comments { and strings are not blocks
+    "apps"
+    {
+        "10" { "name" "{not a block" }
+        "20"
+        {
+            "PersonaName" "Not this one"
+        }
+    }
+    "friends"
+    {
+        "PersonaName"       "Alice \"A\" \\ B"  [$WIN32]
+        unquoted    value
+        "nested" { "PersonaName" "Nested" }
+    }
+}
+"""
+
+
+@pytest.mark.parametrize(
+    "key_path, value",
+    [
+        (PERSONA_NAME_PATH, 'Alice "A" \\ B'),
+        (("UserLocalConfigStore", "friends", "unquoted"), "value"),
+        (("UserLocalConfigStore", "apps", "10", "name"), "{not a block"),
+        (
+            ("UserLocalConfigStore", "friends", "nested", "PersonaName"),
+            "Nested",
+        ),
+        (("UserLocalConfigStore", "friends", "missing"), None),
+        (("UserLocalConfigStore", "friends"), None),
+        (("missing", "PersonaName"), None),
+    ],
+)
+def test_find_buffer_value(key_path, value):
+    assert find_buffer_value(LOCALCONFIG, key_path) == value
+
+
+def test_find_buffer_value_utf8():
+    buffer = '"a" { "name" "Zoë 日本" }'.encode("utf-8")
+    assert find_buffer_value(buffer, ("a", "name")) == "Zoë 日本"
+
+
+def test_find_buffer_value_unterminated():
+    assert find_buffer_value(b'"a" { "b" { "c" "d"', ("a", "x")) is None
+
+
+def test_find_buffer_value_truncated_block():
+    # a file cut off inside a skipped block is skipped in linear time
+    lines = b'        "a"\t\t"b"\n' * 100000
+    buffer = b'"a"\n{\n    "skipped"\n    {\n' + lines + b'        "c"\t\t"d'
+    start = perf_counter()
+    assert find_buffer_value(buffer, ("a", "x")) is None
+    assert perf_counter() - start < 5
+
+
+def test_find_buffer_value_mmap(tmp_path):
+    path = tmp_path / "localconfig.vdf"
+    path.write_bytes(LOCALCONFIG)
+    with open_buffer(path, threshold=1) as buffer:
+        assert find_buffer_value(buffer, PERSONA_NAME_PATH) == 'Alice "A" \\ B'
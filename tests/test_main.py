@@ -0,0 +1,96 @@
+import subprocess
+import sys
+from textwrap import dedent
+from time import monotonic, sleep
+
+from esg.game import Game
+from esg.main import get_artwork_urls, get_installed_games
+from esg.platforms import Provider
+
+
+def make_provider(platform, ids, delay=0, timeout=5):
+    def parse_manifest(path):
+        sleep(delay)
+        return Game(platform, path, f"Game {path}", f"{path}.exe")
+
+    def get_artwork_urls(ids, options):
+        sleep(delay)
+        return {id: f"https://img/{id}" for id in ids}
+
+    return Provider(
+        platform, lambda: ids, parse_manifest, get_artwork_urls, timeout
+    )
+
+
+def test_installed_games_in_order():
+    providers = [make_provider("gog", ["1", "2"]), make_provider("epic", ["3"])]
+    games = get_installed_games(providers=providers)
+    assert [(g.platform, g.id) for g in games] == [
+        ("gog", "1"),
+        ("gog", "2"),
+        ("epic", "3"),
+    ]
+
+
+def test_timeout_applies_to_the_whole_provider():
+    # each manifest is parsed within the timeout, but not all of them
+    slow = make_provider("gog", ["1", "2", "3", "4"], delay=0.3, timeout=0.5)
+    errors = []
+
+    start = monotonic()
+    games = list(
+        get_installed_games(
+            max_workers=1,
+            providers=[slow],
+            on_error=lambda provider, error: errors.append(error),
+        )
+    )
+    assert monotonic() - start < 1
+    assert [g.id for g in games] == ["1"]
+    assert [type(error) for error in errors] == [TimeoutError]
+
+
+def test_artwork_urls_timeout():
+    providers = [
+        make_provider("gog", [], delay=0.5, timeout=0.1),
+        make_provider("epic", []),
+    ]
+    game_ids = {"gog": ["1"], "epic": ["2"], "other": ["3"]}
+    results = {
+        platform: (urls, type(error))
+        for platform, urls, error in get_artwork_urls(game_ids, None, providers)
+    }
+    assert results == {
+        "gog": ({}, TimeoutError),
+        "epic": ({"2": "https://img/2"}, type(None)),
+        "other": ({}, LookupError),
+    }
+
+
+def test_timed_out_provider_does_not_block_exit():
+    script = dedent("""
+        from time import sleep
+
+        from esg.main import get_artwork_urls, get_installed_games
+        from esg.platforms import Provider
+
+        def hang(*args):
+            sleep(30)
+
+        hung = Provider("gog", hang, hang, hang, timeout=0.1)
+        errors = []
+        list(get_installed_games(
+            providers=[hung], on_error=lambda p, e: errors.append(e)
+        ))
+        errors += [e for *_, e in get_artwork_urls({"gog": []}, None, [hung])]
+        print(*(type(error).__name__ for error in errors))
+        """)
+    start = monotonic()
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        timeout=20,
+    )
+    assert result.stdout.split() == ["TimeoutError", "TimeoutError"]
+    assert monotonic() - start < 10
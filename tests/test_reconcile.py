@@ -0,0 +1,71 @@
+from benchmarks.fixtures import make_library
+from esg.game import Game
+from esg.reconcile import index_shortcuts, reconcile_shortcuts
+from esg.steam import create_shortcut
+
+PLATFORMS = {"gog", "epic"}
+
+
+def make_game(id, platform="gog"):
+    return Game(platform, id, f"Game {id}", f"C:\\Games\\{id}\\game.exe")
+
+
+def make_shortcut(id, platform="gog", last_play_time=0):
+    return create_shortcut(
+        f"Game {id}",
+        f"C:\\Games\\{id}\\game.exe",
+        devkit_game_id=id,
+        last_play_time=last_play_time,
+        tags=[platform],
+    )
+
+
+def test_reconcile():
+    custom = create_shortcut("Tool", "C:\\tool.exe")
+    existing = [
+        make_shortcut("1", last_play_time=100),
+        custom,
+        make_shortcut("2", "epic"),
+    ]
+    games = [make_game("3"), make_game("1")]
+
+    result = reconcile_shortcuts(existing, games, PLATFORMS)
+
+    shortcuts = list(result.shortcuts.values())
+    assert [s["DevkitGameID"] for s in shortcuts] == ["3", "1", ""]
+    assert list(result.shortcuts) == ["0", "1", "2"]
+    assert shortcuts[1]["LastPlayTime"] == 100
+    assert shortcuts[2] is custom
+    assert [s["DevkitGameID"] for s in result.added] == ["3"]
+    assert [s["DevkitGameID"] for s in result.unchanged] == ["1"]
+    assert [s["DevkitGameID"] for s in result.removed] == ["2"]
+    assert result.custom == [custom]
+
+
+def test_reconcile_keeps_shortcuts_of_other_platforms():
+    existing = [make_shortcut("1", "epic"), make_shortcut("2", "gog")]
+    result = reconcile_shortcuts(existing, [], {"gog"})
+    assert [s["DevkitGameID"] for s in result.custom] == ["1"]
+    assert [s["DevkitGameID"] for s in result.removed] == ["2"]
+
+
+def test_index_keeps_most_recently_played():
+    shortcuts = [
+        make_shortcut("1", last_play_time=5),
+        make_shortcut("1", last_play_time=9),
+        make_shortcut("1", last_play_time=7),
+        create_shortcut("Tool", "C:\\tool.exe"),
+    ]
+    index = index_shortcuts(shortcuts)
+    assert list(index) == ["1"]
+    assert index["1"]["LastPlayTime"] == 9
+
+
+def test_reconcile_large_library():
+    shortcuts, games = make_library(10000)
+    result = reconcile_shortcuts(shortcuts, games, PLATFORMS)
+    assert len(result.shortcuts) == 10500
+    assert len(result.added) == 1000
+    assert len(result.unchanged) == 9000
+    assert len(result.removed) == 1000
+    assert len(result.custom) == 500
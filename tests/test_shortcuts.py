@@ -0,0 +1,204 @@
+from mmap import mmap
+from struct import pack
+
+import pytest
+import vdf
+
+from esg.fileio import open_buffer
+from esg.steam import create_shortcut
+from esg.steam.shortcuts import (
+    TYPE_COLOR,
+    TYPE_FLOAT32,
+    TYPE_INT64,
+    TYPE_POINTER,
+    TYPE_UINT64,
+    TYPE_WIDESTRING,
+    RawValue,
+    Shortcut,
+    dumps,
+    loads,
+)
+
+
+def make_shortcuts(count):
+    return {
+        "shortcuts": {
+            str(i): create_shortcut(
+                f"Game {i}",
+                f"C:\\Games\\Game {i}\\game.exe",
+                devkit_game_id=str(1000000000 + i),
+                last_play_time=i * 1000,
+                tags=["gog", "Favorites"] if i % 3 else [],
+            )
+            for i in range(count)
+        }
+    }
+
+
+def entry(data):
+    """Wrap binary VDF fields into a `shortcuts.vdf` with one entry."""
+
+    return b"\x00shortcuts\x00\x000\x00" + data + b"\x08\x08\x08"
+
+
+# ----------------------------------------------------------------------
+# Compatibility with vdf
+# ----------------------------------------------------------------------
+def test_dumps_matches_vdf():
+    shortcuts = make_shortcuts(100)
+    assert dumps(shortcuts) == vdf.binary_dumps(shortcuts)
+
+
+def test_loads_matches_vdf():
+    data = vdf.binary_dumps(make_shortcuts(100))
+    shortcuts = loads(data)
+    assert shortcuts == vdf.binary_loads(data)
+    assert all(isinstance(s, Shortcut) for s in shortcuts["shortcuts"].values())
+
+
+def test_empty_file():
+    assert loads(b"") == {"shortcuts": {}}
+    assert loads(vdf.binary_dumps({"shortcuts": {}})) == {"shortcuts": {}}
+
+
+def test_round_trip_keeps_field_order_and_unknown_fields():
+    shortcuts = {
+        "shortcuts": {
+            "0": {
+                "AppName": "Game",
+                "SortAs": "game",
+                "appid": -429629462,
+                "Exe": '"C:\\game.exe"',
+                "tags": {"0": "gog"},
+            }
+        }
+    }
+    data = vdf.binary_dumps(shortcuts)
+    loaded = loads(data)
+    assert list(loaded["shortcuts"]["0"]) == list(shortcuts["shortcuts"]["0"])
+    assert dumps(loaded) == data
+
+
+def test_edited_shortcut_matches_vdf():
+    shortcuts = make_shortcuts(3)
+    loaded = loads(dumps(shortcuts))
+
+    for fields in (shortcuts["shortcuts"]["1"], loaded["shortcuts"]["1"]):
+        fields["LastPlayTime"] = 1234
+        del fields["FlatpakAppID"]
+        fields["SortAs"] = "game"
+    assert dumps(loaded) == vdf.binary_dumps(shortcuts)
+
+
+# ----------------------------------------------------------------------
+# Values
+# ----------------------------------------------------------------------
+@pytest.mark.parametrize(
+    "value, value_type",
+    [
+        (vdf.UINT_64(2**40), TYPE_UINT64),
+        (vdf.INT_64(-(2**40)), TYPE_INT64),
+        (1.5, TYPE_FLOAT32),
+        (vdf.COLOR(0x112233), TYPE_COLOR),
+        (vdf.POINTER(0x445566), TYPE_POINTER),
+    ],
+)
+def test_raw_values_round_trip(value, value_type):
+    data = vdf.binary_dumps({"shortcuts": {"0": {"value": value}}})
+    loaded = loads(data)
+    raw_value = loaded["shortcuts"]["0"]["value"]
+    assert isinstance(raw_value, RawValue)
+    assert raw_value.type == value_type
+    assert dumps(loaded) == data
+
+
+def test_widestring_round_trip():
+    # the first character ends with a zero byte, followed by another one
+    # starting the second character, which must not end the string
+    text = "a\u0100\u00e9"
+    data = entry(
+        b"\x05wide\x00" + text.encode("utf-16-le") + b"\x00\x00"
+        b"\x01AppName\x00Game\x00"
+    )
+    loaded = loads(data)
+    fields = loaded["shortcuts"]["0"]
+    assert fields["wide"] == RawValue(
+        TYPE_WIDESTRING, text.encode("utf-16-le") + b"\x00\x00"
+    )
+    assert fields["AppName"] == "Game"
+    assert dumps(loaded) == data
+
+
+def test_non_utf8_strings_round_trip():
+    data = entry(
+        b"\x01AppName\x00Caf\xe9\x00"
+        b"\x01Caf\xe9\x00\xff\xfe\x00"
+        b'\x01Exe\x00"C:\\caf\xc3\xa9.exe"\x00'
+    )
+    loaded = loads(data)
+    fields = loaded["shortcuts"]["0"]
+    assert fields["AppName"].encode("utf-8", "surrogateescape") == b"Caf\xe9"
+    assert fields["Exe"] == '"C:\\caf\u00e9.exe"'
+    assert dumps(loaded) == data
+
+
+@pytest.mark.parametrize("app_id", [-16, 2**32 - 16])
+def test_signed_and_unsigned_app_ids(app_id):
+    data = dumps({"shortcuts": {"0": {"appid": app_id}}})
+    assert data == entry(b"\x02appid\x00" + pack("<i", -16))
+    assert vdf.binary_loads(data)["shortcuts"]["0"]["appid"] == -16
+
+
+@pytest.mark.parametrize("app_id", [-(2**31), 2**31 - 1, 2**31, 2**32 - 1])
+def test_app_id_limits(app_id):
+    data = dumps({"shortcuts": {"0": {"appid": app_id}}})
+    assert data.endswith(pack("<I", app_id % 2**32) + b"\x08\x08\x08")
+
+
+@pytest.mark.parametrize(
+    "value, value_type",
+    [(2**32, vdf.UINT_64), (2**64 - 1, vdf.UINT_64), (-(2**40), vdf.INT_64)],
+)
+def test_large_ints_are_written_as_64_bit(value, value_type):
+    data = dumps({"shortcuts": {"0": {"LastPlayTime": value}}})
+    decoded = vdf.binary_loads(data)["shortcuts"]["0"]["LastPlayTime"]
+    assert decoded == value
+    assert isinstance(decoded, value_type)
+    assert dumps(loads(data)) == data
+
+
+@pytest.mark.parametrize("value", [2**64, -(2**63) - 1])
+def test_out_of_range_ints(value):
+    with pytest.raises(ValueError):
+        dumps({"shortcuts": {"0": {"LastPlayTime": value}}})
+
+
+def test_unknown_value_type():
+    with pytest.raises(ValueError):
+        loads(entry(b"\x09bad\x00"))
+
+
+def test_unterminated_string():
+    with pytest.raises(ValueError):
+        loads(b"\x00shortcuts\x00\x000\x00\x01AppName\x00Game")
+
+
+# ----------------------------------------------------------------------
+# Buffers
+# ----------------------------------------------------------------------
+def test_loads_mmap(tmp_path):
+    data = vdf.binary_dumps(make_shortcuts(50))
+    path = tmp_path / "shortcuts.vdf"
+    path.write_bytes(data)
+
+    with open_buffer(path, threshold=1) as buffer:
+        assert isinstance(buffer, mmap)
+        shortcuts = loads(buffer)
+    assert shortcuts == vdf.binary_loads(data)
+    assert dumps(shortcuts) == data
+
+
+def test_loads_memoryview():
+    data = vdf.binary_dumps(make_shortcuts(5))
+    assert loads(memoryview(data)) == loads(data)
+    assert loads(bytearray(data)) == loads(data)
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+import esg.util
+from esg.steam import create_shortcut, load_shortcuts, save_shortcuts
+from esg.steam.shortcuts import loads
+from tests.conftest import STEAM_ID
+
+
+def make_shortcuts(version):
+    shortcut = create_shortcut(
+        f"Game {version}", "C:\\game.exe", devkit_game_id="1", tags=["gog"]
+    )
+    return {"shortcuts": {"0": shortcut}}
+
+
+def save_versions(versions):
+    for version in versions:
+        assert save_shortcuts(STEAM_ID, make_shortcuts(version))
+
+
+def get_app_names(path):
+    """Get the app names saved in each backup, most recent first."""
+
+    backups = sorted(path.parent.glob(f"{path.name}.*.bak"))
+    return [
+        loads(backup.read_bytes())["shortcuts"]["0"]["AppName"]
+        for backup in backups
+    ]
+
+
+def test_save_and_load(shortcuts_path):
+    assert load_shortcuts(STEAM_ID) == {"shortcuts": {}}
+    save_versions([1])
+    assert load_shortcuts(STEAM_ID) == make_shortcuts(1)
+
+
+def test_save_unchanged_does_not_write(shortcuts_path):
+    save_versions([1])
+    mtime = shortcuts_path.stat().st_mtime_ns
+    assert not save_shortcuts(STEAM_ID, make_shortcuts(1))
+    assert shortcuts_path.stat().st_mtime_ns == mtime
+    assert get_app_names(shortcuts_path) == []
+
+
+def test_save_rotates_backups(shortcuts_path):
+    save_versions([1, 2, 3, 4, 5])
+    assert load_shortcuts(STEAM_ID) == make_shortcuts(5)
+    assert get_app_names(shortcuts_path) == ["Game 4", "Game 3", "Game 2"]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permissions")
+def test_save_keeps_mode(shortcuts_path):
+    save_versions([1])
+    shortcuts_path.chmod(0o644)
+    save_versions([2])
+    assert shortcuts_path.stat().st_mode & 0o777 == 0o644
+
+
+@pytest.mark.parametrize("fault", ["fsync", "replace"])
+def test_failed_save_keeps_file_and_backups(shortcuts_path, monkeypatch, fault):
+    save_versions([1, 2, 3])
+    content = shortcuts_path.read_bytes()
+
+    # only fail the write of shortcuts.vdf, not the backups rotation
+    real_replace = esg.util.replace
+
+    def failing_replace(source, target):
+        if str(target) == str(shortcuts_path):
+            raise OSError("injected failure")
+        real_replace(source, target)
+
+    def failing_fsync(fd):
+        raise OSError("injected failure")
+
+    with monkeypatch.context() as patch:
+        if fault == "fsync":
+            patch.setattr(esg.util, "fsync", failing_fsync)
+        else:
+            patch.setattr(esg.util, "replace", failing_replace)
+
+        with pytest.raises(OSError, match="injected"):
+            save_shortcuts(STEAM_ID, make_shortcuts(4))
+    assert shortcuts_path.read_bytes() == content
+    assert get_app_names(shortcuts_path) == ["Game 3", "Game 2", "Game 1"]
+    assert not list(shortcuts_path.parent.glob(".*"))
+
+    # saving again doesn't rotate the backup of the same version out
+    save_versions([4])
+    assert load_shortcuts(STEAM_ID) == make_shortcuts(4)
+    assert get_app_names(shortcuts_path) == ["Game 3", "Game 2", "Game 1"]
@@ -0,0 +1,106 @@
+import os
+import stat
+
+import pytest
+
+import esg.util
+from esg.util import atomic_write, backup_file, file_matches
+
+
+def get_mode(path):
+    return stat.S_IMODE(path.stat().st_mode)
+
+
+def list_files(path):
+    return sorted(p.name for p in path.iterdir())
+
+
+def fail(*args, **kwargs):
+    raise OSError("injected failure")
+
+
+# ----------------------------------------------------------------------
+# atomic_write
+# ----------------------------------------------------------------------
+def test_atomic_write(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(b"old")
+    atomic_write(path, b"new")
+    assert path.read_bytes() == b"new"
+    assert list_files(tmp_path) == ["file"]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permissions")
+@pytest.mark.parametrize("mode", [0o644, 0o640, 0o600])
+def test_atomic_write_keeps_mode(tmp_path, mode):
+    path = tmp_path / "file"
+    path.write_bytes(b"old")
+    path.chmod(mode)
+    atomic_write(path, b"new")
+    assert get_mode(path) == mode
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permissions")
+def test_atomic_write_new_file_mode(tmp_path):
+    path = tmp_path / "file"
+    atomic_write(path, b"new")
+    assert get_mode(path) == esg.util._FILE_MODE
+
+
+@pytest.mark.parametrize("name", ["fsync", "replace", "copymode"])
+def test_atomic_write_failure_keeps_file(tmp_path, monkeypatch, name):
+    path = tmp_path / "file"
+    path.write_bytes(b"old")
+    monkeypatch.setattr(esg.util, name, fail)
+
+    with pytest.raises(OSError, match="injected"):
+        atomic_write(path, b"new")
+    assert path.read_bytes() == b"old"
+    assert list_files(tmp_path) == ["file"]
+
+
+def test_atomic_write_interrupted(tmp_path, monkeypatch):
+    def interrupt(fd):
+        raise KeyboardInterrupt
+
+    path = tmp_path / "file"
+    path.write_bytes(b"old")
+    monkeypatch.setattr(esg.util, "fsync", interrupt)
+
+    with pytest.raises(KeyboardInterrupt):
+        atomic_write(path, b"new")
+    assert path.read_bytes() == b"old"
+    assert list_files(tmp_path) == ["file"]
+
+
+# ----------------------------------------------------------------------
+# file_matches, backup_file
+# ----------------------------------------------------------------------
+def test_file_matches(tmp_path):
+    path = tmp_path / "file"
+    assert not file_matches(path, b"data")
+    path.write_bytes(b"data")
+    assert file_matches(path, b"data")
+    assert not file_matches(path, b"date")
+    assert not file_matches(path, b"data!")
+
+
+def test_backup_file_rotation(tmp_path):
+    path = tmp_path / "file"
+    for version in range(1, 5):
+        backup_file(path, 2)
+        atomic_write(path, b"%d" % version)
+
+    assert path.read_bytes() == b"4"
+    assert (tmp_path / "file.1.bak").read_bytes() == b"3"
+    assert (tmp_path / "file.2.bak").read_bytes() == b"2"
+    assert not (tmp_path / "file.3.bak").exists()
+
+
+def test_backup_file_once_per_version(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(b"1")
+    backup_file(path, 2)
+    backup_file(path, 2)
+    assert (tmp_path / "file.1.bak").read_bytes() == b"1"
+    assert not (tmp_path / "file.2.bak").exists()
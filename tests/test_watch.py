@@ -0,0 +1,238 @@
+import os
+from json import dumps as json_dump
+from threading import Event, Timer
+
+import pytest
+
+from esg.game import Game
+from esg.platforms import Provider, epic, gog
+from esg.steam import create_shortcut, load_shortcuts, save_shortcuts
+from esg.util import expand_path
+from esg.watch import PollingWatcher, ShortcutsFile, diff_games
+from tests.conftest import STEAM_ID
+
+
+@pytest.fixture
+def launchers(tmp_path, monkeypatch):
+    """Point the GOG Galaxy and EGL paths to temporary directories."""
+
+    program_data = tmp_path / "ProgramData"
+    monkeypatch.setenv("ProgramData", str(program_data))
+    library_path = tmp_path / "GOG Games"
+    library_path.mkdir()
+    config_path = program_data / "GOG.com" / "Galaxy" / "config.json"
+    config_path.parent.mkdir(parents=True)
+    config_path.write_text(json_dump({"libraryPath": str(library_path)}))
+    manifests_path = (
+        program_data / "Epic" / "EpicGamesLauncher" / "Data" / "Manifests"
+    )
+    manifests_path.mkdir(parents=True)
+    return library_path, manifests_path
+
+
+def install_gog_game(library_path, id, name):
+    game_path = library_path / id
+    game_path.mkdir(exist_ok=True)
+    info = {"gameId": id, "rootGameId": id, "name": name, "playTasks": []}
+    info_path = game_path / f"goggame-{id}.info"
+    info_path.write_text(json_dump(info))
+    return info_path
+
+
+def install_epic_game(manifests_path, id, name):
+    manifest = {
+        "AppName": id,
+        "CatalogItemId": id,
+        "CatalogNamespace": "ns",
+        "DisplayName": name,
+        "InstallLocation": f"C:\\Games\\{name}",
+        "LaunchExecutable": "game.exe",
+    }
+    manifest_path = manifests_path / f"{id}.item"
+    manifest_path.write_text(json_dump(manifest))
+    return manifest_path
+
+
+def touch(path, seconds):
+    """Move the modification time of a file, in case the file system's
+    resolution is too coarse to tell two quick writes apart."""
+
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10**9))
+
+
+def get_games(providers):
+    return [
+        game
+        for provider in providers
+        for game in map(provider.parse_manifest, provider.list_manifests())
+        if game
+    ]
+
+
+def make_watcher(**kwargs):
+    options = {"interval": 0.01, "settle": 0.05, **kwargs}
+    return PollingWatcher([gog.PROVIDER, epic.PROVIDER], **options)
+
+
+# ----------------------------------------------------------------------
+# PollingWatcher
+# ----------------------------------------------------------------------
+def test_install_update_remove(launchers):
+    library_path, manifests_path = launchers
+    providers = [gog.PROVIDER, epic.PROVIDER]
+    info_path = install_gog_game(library_path, "1", "One")
+    watcher = make_watcher()
+    games = get_games(providers)
+
+    # install
+    manifest_path = install_epic_game(manifests_path, "e1", "Epic One")
+    assert watcher.wait_for_changes() == [str(manifest_path)]
+    new_games = get_games(providers)
+    changes = diff_games(games, new_games)
+    assert [g.name for g in changes.added] == ["Epic One"]
+    assert changes.updated == changes.removed == []
+    games = new_games
+
+    # update
+    install_gog_game(library_path, "1", "One Remastered")
+    touch(info_path, 1)
+    assert watcher.wait_for_changes() == [str(info_path)]
+    new_games = get_games(providers)
+    changes = diff_games(games, new_games)
+    assert [g.name for g in changes.updated] == ["One Remastered"]
+    assert changes.added == changes.removed == []
+    games = new_games
+
+    # remove
+    manifest_path.unlink()
+    assert watcher.wait_for_changes() == [str(manifest_path)]
+    changes = diff_games(games, get_games(providers))
+    assert [g.name for g in changes.removed] == ["Epic One"]
+    assert changes.added == changes.updated == []
+
+
+def test_bursts_of_changes_are_merged(launchers):
+    library_path, manifests_path = launchers
+    watcher = make_watcher(settle=0.3)
+
+    paths = [install_gog_game(library_path, "1", "One")]
+    # changed while the first change settles
+    Timer(
+        0.1,
+        lambda: paths.append(install_epic_game(manifests_path, "e1", "E")),
+    ).start()
+    changed_paths = watcher.wait_for_changes()
+    assert changed_paths == sorted(str(path) for path in paths)
+    assert len(paths) == 2
+
+
+def test_library_path_change(launchers, tmp_path):
+    library_path, _ = launchers
+    install_gog_game(library_path, "1", "One")
+    watcher = make_watcher()
+
+    new_library_path = tmp_path / "Games"
+    new_library_path.mkdir()
+    new_info_path = install_gog_game(new_library_path, "2", "Two")
+    expand_path(gog.GALAXY_CONFIG_PATH).write_text(
+        json_dump({"libraryPath": str(new_library_path)})
+    )
+    assert watcher.wait_for_changes() == sorted(
+        [str(library_path / "1" / "goggame-1.info"), str(new_info_path)]
+    )
+
+
+def test_failing_provider(launchers):
+    library_path, manifests_path = launchers
+    install_gog_game(library_path, "1", "One")
+    failing = False
+    errors = []
+
+    def list_manifests():
+        if failing:
+            raise OSError("library unavailable")
+        return gog.list_info_files()
+
+    provider = Provider("gog", list_manifests, gog.parse_info_file, None)
+    watcher = PollingWatcher(
+        [provider, epic.PROVIDER],
+        interval=0.01,
+        settle=0.05,
+        on_error=lambda provider, error: errors.append(error),
+    )
+
+    # the failing launcher's manifests are kept, reported once
+    failing = True
+    manifest_path = install_epic_game(manifests_path, "e1", "Epic One")
+    assert watcher.wait_for_changes() == [str(manifest_path)]
+    assert [str(error) for error in errors] == ["library unavailable"]
+
+
+def test_hung_provider(launchers):
+    library_path, manifests_path = launchers
+    info_path = install_gog_game(library_path, "1", "One")
+    unblocked = Event()
+    calls = []
+    errors = []
+
+    def list_manifests():
+        calls.append(None)
+        unblocked.wait(10)
+        return gog.list_info_files()
+
+    provider = Provider(
+        "gog", list_manifests, gog.parse_info_file, None, timeout=0.1
+    )
+    watcher = PollingWatcher(
+        [provider, epic.PROVIDER],
+        interval=0.01,
+        settle=0.05,
+        on_error=lambda provider, error: errors.append(error),
+    )
+    assert [type(error) for error in errors] == [TimeoutError]
+
+    # the other launchers are still watched, the hung listing isn't
+    # started again
+    manifest_path = install_epic_game(manifests_path, "e1", "Epic One")
+    assert watcher.wait_for_changes() == [str(manifest_path)]
+    assert len(calls) == 1
+
+    # listed again once the hung listing is done
+    unblocked.set()
+    assert watcher.wait_for_changes() == [str(info_path)]
+    assert len(errors) == 1
+
+
+def test_stop(launchers):
+    watcher = make_watcher()
+    Timer(0.05, watcher.stop).start()
+    assert watcher.wait_for_changes() is None
+
+
+# ----------------------------------------------------------------------
+# diff_games, ShortcutsFile
+# ----------------------------------------------------------------------
+def test_diff_games_by_platform_and_id():
+    one = Game("gog", "1", "One", "gog.exe")
+    epic_one = Game("epic", "1", "One", "epic.exe")
+    changes = diff_games([one], [one, epic_one])
+    assert changes.added == [epic_one]
+    assert not any(diff_games([one, epic_one], [epic_one, one]))
+
+
+def test_shortcuts_file_reloads_changes(shortcuts_path):
+    shortcuts_file = ShortcutsFile(STEAM_ID)
+    assert shortcuts_file.load() == {}
+
+    shortcut = create_shortcut("One", "C:\\one.exe")
+    assert shortcuts_file.save({"0": shortcut})
+    loaded = shortcuts_file.load()
+    assert shortcuts_file.load() is loaded
+
+    # saved by Steam
+    shortcuts = load_shortcuts(STEAM_ID)
+    shortcuts["shortcuts"]["0"]["LastPlayTime"] = 1234
+    save_shortcuts(STEAM_ID, shortcuts)
+    touch(shortcuts_path, 1)
+    assert shortcuts_file.load()["0"]["LastPlayTime"] == 1234